@@ -5,8 +5,11 @@ class Settings(BaseSettings):
     admin_user: str = "admin"
     admin_pass: str = "changeme"
     db_path: str = "data/geofeatures.db"
+    db_read_pool_size: int = 4
     uploads_dir: str = "uploads"
     max_features_per_request: int = 10000
+    bbox_skip_below_features: int = 0   # serve layers smaller than this whole, ignoring BBOX; 0 = off
+    gml_cache_max_bytes: int = 32 * 1024 * 1024   # memory for cached GetFeature GML geometries; 0 = off
     service_title: str = "GeoFeatureService"
     service_abstract: str = "Lightweight WFS 2.0.0 feature server"
     service_url: str = "http://localhost:8000/wfs"
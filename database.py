@@ -1,21 +1,141 @@
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
+
 from config import settings
 
+# One shared writer (serialised by a lock) plus a bounded pool of read-only
+# connections.  Both are opened once in init_db() and reused for every request.
+_writer: sqlite3.Connection | None = None
+_writer_lock = threading.Lock()
+_readers: queue.Queue[sqlite3.Connection] = queue.Queue()
+
+
+# Prepared statements kept per connection (sqlite3 default is 128).
+_STATEMENT_CACHE_SIZE = 256
+
+_WRITER_PRAGMAS = (
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-64000",        # 64 MB page cache
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",      # 256 MB memory-mapped I/O
+    "PRAGMA wal_autocheckpoint=1000",
+)
 
-def get_db() -> sqlite3.Connection:
-    conn = sqlite3.connect(settings.db_path, check_same_thread=False)
+_READER_PRAGMAS = (
+    "PRAGMA query_only=ON",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA temp_store=MEMORY",
+    # mmap_size is per connection; without it R*Tree and B-tree pages are
+    # read() into each reader's cache instead of shared from the OS.
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def _configure(conn: sqlite3.Connection, pragmas: tuple[str, ...]) -> sqlite3.Connection:
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA foreign_keys=ON")
+    for pragma in pragmas:
+        conn.execute(pragma)
     return conn
 
 
+def _connect_writer() -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        settings.db_path,
+        check_same_thread=False,
+        isolation_level=None,
+        cached_statements=_STATEMENT_CACHE_SIZE,
+    )
+    return _configure(conn, _WRITER_PRAGMAS)
+
+
+def _connect_reader() -> sqlite3.Connection:
+    uri = Path(settings.db_path).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(
+        uri, uri=True, check_same_thread=False, cached_statements=_STATEMENT_CACHE_SIZE
+    )
+    return _configure(conn, _READER_PRAGMAS)
+
+
+# ── Connection access ─────────────────────────────────────────────────────────
+
+@contextmanager
+def reader() -> Iterator[sqlite3.Connection]:
+    """Borrow a read-only connection from the pool."""
+    conn = _readers.get()
+    try:
+        yield conn
+    finally:
+        _readers.put(conn)
+
+
+@contextmanager
+def writer() -> Iterator[sqlite3.Connection]:
+    """Hold the shared writer connection for the duration of the block."""
+    with _writer_lock:
+        try:
+            yield _writer
+        finally:
+            if _writer.in_transaction:
+                _writer.rollback()
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Run the block inside BEGIN IMMEDIATE / COMMIT, rolling back on error."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+@contextmanager
+def savepoint(conn: sqlite3.Connection, name: str) -> Iterator[sqlite3.Connection]:
+    """Run the block inside a SAVEPOINT of an enclosing transaction."""
+    conn.execute(f"SAVEPOINT {name}")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute(f"ROLLBACK TO {name}")
+        conn.execute(f"RELEASE {name}")
+        raise
+    conn.execute(f"RELEASE {name}")
+
+
+def get_reader() -> Iterator[sqlite3.Connection]:
+    """FastAPI dependency for handlers that only SELECT."""
+    with reader() as conn:
+        yield conn
+
+
+def get_writer() -> Iterator[sqlite3.Connection]:
+    """FastAPI dependency for handlers that modify the database."""
+    with writer() as conn:
+        yield conn
+
+
+# ── Schema / lifecycle ────────────────────────────────────────────────────────
+
 def init_db() -> None:
+    global _writer
     Path(settings.db_path).parent.mkdir(parents=True, exist_ok=True)
-    conn = get_db()
-    with conn:
-        conn.executescript("""
+    _writer = _connect_writer()
+    # journal_mode is persistent in the database file, so it is set once here
+    # rather than on every connection.
+    _writer.execute("PRAGMA journal_mode=WAL")
+    has_rtree = _writer.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'features_rtree'"
+    ).fetchone() is not None
+    _writer.executescript("""
 CREATE TABLE IF NOT EXISTS layers (
     id               INTEGER PRIMARY KEY AUTOINCREMENT,
     name             TEXT    NOT NULL UNIQUE,
@@ -48,8 +168,33 @@ CREATE TABLE IF NOT EXISTS features (
 
 CREATE INDEX IF NOT EXISTS idx_features_layer
     ON features(layer_id);
-CREATE INDEX IF NOT EXISTS idx_features_bbox
-    ON features(layer_id, bbox_minx, bbox_miny, bbox_maxx, bbox_maxy);
+DROP INDEX IF EXISTS idx_features_bbox;
+
+-- Spatial index over feature bboxes, kept in sync with features by triggers.
+CREATE VIRTUAL TABLE IF NOT EXISTS features_rtree
+    USING rtree(id, minx, maxx, miny, maxy);
+
+CREATE TRIGGER IF NOT EXISTS features_rtree_insert
+AFTER INSERT ON features WHEN NEW.bbox_minx IS NOT NULL
+BEGIN
+    INSERT INTO features_rtree VALUES
+        (NEW.id, NEW.bbox_minx, NEW.bbox_maxx, NEW.bbox_miny, NEW.bbox_maxy);
+END;
+
+CREATE TRIGGER IF NOT EXISTS features_rtree_update
+AFTER UPDATE OF bbox_minx, bbox_miny, bbox_maxx, bbox_maxy ON features
+BEGIN
+    DELETE FROM features_rtree WHERE id = OLD.id;
+    INSERT INTO features_rtree
+        SELECT NEW.id, NEW.bbox_minx, NEW.bbox_maxx, NEW.bbox_miny, NEW.bbox_maxy
+        WHERE NEW.bbox_minx IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS features_rtree_delete
+AFTER DELETE ON features
+BEGIN
+    DELETE FROM features_rtree WHERE id = OLD.id;
+END;
 
 CREATE TABLE IF NOT EXISTS symbology_rules (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -70,4 +215,23 @@ CREATE TABLE IF NOT EXISTS symbology_rules (
 CREATE INDEX IF NOT EXISTS idx_rules_layer
     ON symbology_rules(layer_id, rule_order);
         """)
-    conn.close()
+    if not has_rtree:
+        # Databases created before the R*Tree existed need it backfilled once.
+        with transaction(_writer):
+            _writer.execute(
+                "INSERT INTO features_rtree "
+                "SELECT id, bbox_minx, bbox_maxx, bbox_miny, bbox_maxy "
+                "FROM features WHERE bbox_minx IS NOT NULL"
+            )
+    _writer.execute("PRAGMA optimize")
+    for _ in range(settings.db_read_pool_size):
+        _readers.put(_connect_reader())
+
+
+def close_db() -> None:
+    global _writer
+    while not _readers.empty():
+        _readers.get_nowait().close()
+    if _writer is not None:
+        _writer.close()
+        _writer = None
@@ -1,35 +1,55 @@
 import base64
+import hmac
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import ORJSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from config import settings
-from database import init_db
+from database import close_db, init_db
 from routers import wfs, admin_layers, admin_import, admin_symbology
 
 
 # ── Basic Auth middleware ─────────────────────────────────────────────────────
 
-class BasicAuthMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, username: str, password: str):
-        super().__init__(app)
-        self._token = base64.b64encode(f"{username}:{password}".encode()).decode()
-
-    async def dispatch(self, request: Request, call_next):
-        if request.url.path.startswith("/api/admin"):
-            auth = request.headers.get("Authorization", "")
-            if not auth.startswith("Basic ") or auth[6:] != self._token:
-                return Response(
-                    content="Unauthorized",
-                    status_code=401,
-                    headers={"WWW-Authenticate": 'Basic realm="GeoFeatureService Admin"'},
-                )
-        return await call_next(request)
+class BasicAuthMiddleware:
+    """Pure ASGI middleware enforcing HTTP Basic auth on the admin sub-app."""
+
+    _UNAUTHORIZED_START = {
+        "type": "http.response.start",
+        "status": 401,
+        "headers": [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", b"12"),
+            (b"www-authenticate", b'Basic realm="GeoFeatureService Admin"'),
+        ],
+    }
+    _UNAUTHORIZED_BODY = {"type": "http.response.body", "body": b"Unauthorized"}
+
+    def __init__(self, app: ASGIApp, username: str, password: str):
+        self.app = app
+        self._expected = b"Basic " + base64.b64encode(f"{username}:{password}".encode())
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        auth = b""
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                auth = value
+                break
+        if not hmac.compare_digest(auth, self._expected):
+            await send(self._UNAUTHORIZED_START)
+            await send(self._UNAUTHORIZED_BODY)
+            return
+
+        await self.app(scope, receive, send)
 
 
 # ── App lifespan ──────────────────────────────────────────────────────────────
@@ -39,6 +59,7 @@ async def lifespan(app: FastAPI):
     init_db()
     Path(settings.uploads_dir).mkdir(parents=True, exist_ok=True)
     yield
+    close_db()
 
 
 # ── App setup ─────────────────────────────────────────────────────────────────
@@ -48,9 +69,9 @@ app = FastAPI(
     description="Lightweight WFS 2.0.0 feature server with admin UI",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
-app.add_middleware(BasicAuthMiddleware, username=settings.admin_user, password=settings.admin_pass)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -59,10 +80,18 @@ app.add_middleware(
 )
 
 app.include_router(wfs.router,              tags=["WFS"])
-app.include_router(admin_layers.router,     prefix="/api/admin", tags=["Admin - Layers"])
-app.include_router(admin_import.router,     prefix="/api/admin", tags=["Admin - Import"])
-app.include_router(admin_symbology.router,  prefix="/api/admin", tags=["Admin - Symbology"])
 
+# Admin API lives in its own sub-app so only its requests pass through auth
+admin_app = FastAPI(
+    title="GeoFeatureService Admin",
+    default_response_class=ORJSONResponse,
+)
+admin_app.add_middleware(BasicAuthMiddleware, username=settings.admin_user, password=settings.admin_pass)
+admin_app.include_router(admin_layers.router,     tags=["Admin - Layers"])
+admin_app.include_router(admin_import.router,     tags=["Admin - Import"])
+admin_app.include_router(admin_symbology.router,  tags=["Admin - Symbology"])
+
+app.mount("/api/admin", admin_app)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
@@ -4,7 +4,7 @@ from dataclasses import dataclass, field
 from typing import Any
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Layer:
     id: int
     name: str
@@ -45,7 +45,7 @@ class Layer:
         return all(v is not None for v in [self.bbox_minx, self.bbox_miny, self.bbox_maxx, self.bbox_maxy])
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Feature:
     id: int
     layer_id: int
@@ -72,7 +72,7 @@ class Feature:
         )
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SymbologyRule:
     id: int
     layer_id: int
@@ -5,12 +5,21 @@ from pathlib import Path
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
 
 from config import settings
-from database import get_db
+from database import get_writer
 from models.api_models import ImportResult
-from services.import_service import import_file
+from services import wfs_service
+from services.import_service import FILEOBJ_FORMATS, import_file, import_file_obj
 
 router = APIRouter()
 
+_COPY_CHUNK_SIZE = 1 << 20   # 1 MiB
+_SQL_CHECK_LAYER = "SELECT id FROM layers WHERE id = ?"
+
+# The lifespan handler creates uploads_dir at startup.
+_UPLOADS_DIR = Path(settings.uploads_dir)
+_ALLOWED_SUFFIXES = frozenset({".geojson", ".json", ".zip", ".gpkg", ".csv"})
+_ALLOWED_SUFFIXES_TEXT = ", ".join(sorted(_ALLOWED_SUFFIXES))
+
 
 @router.post("/layers/{layer_id}/import", response_model=ImportResult)
 async def import_layer_file(
@@ -20,31 +29,48 @@ async def import_layer_file(
     lat_field: str | None = Form(default=None),
     lon_field: str | None = Form(default=None),
     replace_existing: bool = Form(default=False),
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_writer),
 ):
     # Verify layer exists
-    row = db.execute("SELECT id FROM layers WHERE id = ?", (layer_id,)).fetchone()
+    row = db.execute(_SQL_CHECK_LAYER, (layer_id,)).fetchone()
     if not row:
         raise HTTPException(status_code=404, detail=f"Layer {layer_id} not found")
 
     # Validate extension
     filename = file.filename or "upload"
     suffix = Path(filename).suffix.lower()
-    allowed = {".geojson", ".json", ".zip", ".gpkg", ".csv"}
-    if suffix not in allowed:
+    if suffix not in _ALLOWED_SUFFIXES:
         raise HTTPException(
             status_code=400,
-            detail=f"Unsupported file type '{suffix}'. Allowed: {', '.join(sorted(allowed))}",
+            detail=f"Unsupported file type '{suffix}'. Allowed: {_ALLOWED_SUFFIXES_TEXT}",
         )
 
-    # Save upload to temp file
-    uploads_dir = Path(settings.uploads_dir)
-    uploads_dir.mkdir(parents=True, exist_ok=True)
-    tmp_path = uploads_dir / f"layer_{layer_id}_{filename}"
+    # GeoJSON/CSV are parsed straight from the upload's spooled file; fiona
+    # formats need a real path, so only those are written to uploads_dir.
+    if suffix in FILEOBJ_FORMATS:
+        file.file.seek(0)
+        try:
+            result = import_file_obj(
+                file.file,
+                suffix,
+                layer_id=layer_id,
+                db=db,
+                source_srid=srid,
+                lat_field=lat_field or None,
+                lon_field=lon_field or None,
+                replace_existing=replace_existing,
+            )
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        finally:
+            wfs_service.invalidate_metadata()
+        return result
+
+    tmp_path = _UPLOADS_DIR / f"layer_{layer_id}_{filename}"
 
     try:
         with open(tmp_path, "wb") as dst:
-            shutil.copyfileobj(file.file, dst)
+            shutil.copyfileobj(file.file, dst, length=_COPY_CHUNK_SIZE)
 
         result = import_file(
             file_path=tmp_path,
@@ -59,5 +85,6 @@ async def import_layer_file(
         raise HTTPException(status_code=422, detail=str(e))
     finally:
         tmp_path.unlink(missing_ok=True)
+        wfs_service.invalidate_metadata()
 
     return result
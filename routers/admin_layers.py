@@ -2,102 +2,120 @@ import json
 import sqlite3
 from typing import Optional
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 
-from database import get_db
+from database import get_reader, get_writer, transaction
 from models.api_models import LayerCreate, LayerResponse, LayerUpdate
-from models.db_models import Layer, Feature
-from services.geometry_service import geom_to_geojson, wkb_to_geom
+from services import wfs_service
+from services.geometry_service import geoms_to_geojson_text, wkbs_to_geoms
 
 router = APIRouter()
 
+_SQL_GET_LAYER = "SELECT * FROM layers WHERE id = ?"
+_SQL_LIST_LAYERS = "SELECT * FROM layers ORDER BY created_at DESC"
+_SQL_INSERT_LAYER = "INSERT INTO layers (name, title, description) VALUES (?, ?, ?) RETURNING *"
+_SQL_DELETE_LAYER = "DELETE FROM layers WHERE id = ?"
+_SQL_PREVIEW_FEATURES = "SELECT fid, geometry, properties FROM features WHERE layer_id = ? LIMIT ?"
 
-def _layer_response(layer: Layer) -> dict:
-    bbox = (
-        [layer.bbox_minx, layer.bbox_miny, layer.bbox_maxx, layer.bbox_maxy]
-        if layer.has_bbox
-        else None
-    )
+
+def _row_to_layer_dict(row: sqlite3.Row) -> dict:
+    """Build the LayerResponse payload straight from a layers row."""
+    bbox = [row["bbox_minx"], row["bbox_miny"], row["bbox_maxx"], row["bbox_maxy"]]
     return {
-        "id": layer.id,
-        "name": layer.name,
-        "title": layer.title,
-        "description": layer.description,
-        "geometry_type": layer.geometry_type,
-        "srid": layer.srid,
-        "bbox": bbox,
-        "feature_count": layer.feature_count,
-        "attribute_schema": layer.attribute_schema,
-        "created_at": layer.created_at,
-        "updated_at": layer.updated_at,
+        "id": row["id"],
+        "name": row["name"],
+        "title": row["title"],
+        "description": row["description"],
+        "geometry_type": row["geometry_type"],
+        "srid": row["srid"],
+        "bbox": bbox if None not in bbox else None,
+        "feature_count": row["feature_count"],
+        "attribute_schema": json.loads(row["attribute_schema"] or "{}"),
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
     }
 
 
-def _get_layer_or_404(layer_id: int, db: sqlite3.Connection) -> Layer:
-    row = db.execute("SELECT * FROM layers WHERE id = ?", (layer_id,)).fetchone()
+def _get_layer_or_404(layer_id: int, db: sqlite3.Connection) -> sqlite3.Row:
+    row = db.execute(_SQL_GET_LAYER, (layer_id,)).fetchone()
     if not row:
         raise HTTPException(status_code=404, detail=f"Layer {layer_id} not found")
-    return Layer.from_row(row)
+    return row
 
 
 # ── List ──────────────────────────────────────────────────────────────────────
 
 @router.get("/layers", response_model=list[LayerResponse])
-def list_layers(db: sqlite3.Connection = Depends(get_db)):
-    rows = db.execute("SELECT * FROM layers ORDER BY created_at DESC").fetchall()
-    return [_layer_response(Layer.from_row(r)) for r in rows]
+def list_layers(db: sqlite3.Connection = Depends(get_reader)):
+    rows = db.execute(_SQL_LIST_LAYERS).fetchall()
+    return [_row_to_layer_dict(r) for r in rows]
 
 
 # ── Create ────────────────────────────────────────────────────────────────────
 
 @router.post("/layers", response_model=LayerResponse, status_code=201)
-def create_layer(body: LayerCreate, db: sqlite3.Connection = Depends(get_db)):
+def create_layer(body: LayerCreate, db: sqlite3.Connection = Depends(get_writer)):
     try:
-        with db:
-            cur = db.execute(
-                "INSERT INTO layers (name, title, description) VALUES (?, ?, ?)",
+        with transaction(db):
+            row = db.execute(
+                _SQL_INSERT_LAYER,
                 (body.name, body.title or body.name, body.description),
-            )
-        layer_id = cur.lastrowid
+            ).fetchone()
     except sqlite3.IntegrityError:
         raise HTTPException(status_code=409, detail=f"Layer name '{body.name}' already exists")
-    layer = _get_layer_or_404(layer_id, db)
-    return _layer_response(layer)
+    wfs_service.invalidate_metadata()
+    return _row_to_layer_dict(row)
 
 
 # ── Get ───────────────────────────────────────────────────────────────────────
 
 @router.get("/layers/{layer_id}", response_model=LayerResponse)
-def get_layer(layer_id: int, db: sqlite3.Connection = Depends(get_db)):
-    return _layer_response(_get_layer_or_404(layer_id, db))
+def get_layer(layer_id: int, db: sqlite3.Connection = Depends(get_reader)):
+    return _row_to_layer_dict(_get_layer_or_404(layer_id, db))
 
 
 # ── Update ────────────────────────────────────────────────────────────────────
 
+# One fixed statement per combination of LayerUpdate fields, so every PATCH
+# hits sqlite3's per-connection statement cache instead of building SQL.
+_LAYER_UPDATE_FIELDS = ("title", "description")
+_UPDATE_LAYER_SQL = {
+    fields: (
+        "UPDATE layers SET "
+        + ", ".join(f"{f} = ?" for f in fields)
+        + ", updated_at = datetime('now') WHERE id = ? RETURNING *"
+    )
+    for fields in (("title",), ("description",), _LAYER_UPDATE_FIELDS)
+}
+
+
 @router.patch("/layers/{layer_id}", response_model=LayerResponse)
-def update_layer(layer_id: int, body: LayerUpdate, db: sqlite3.Connection = Depends(get_db)):
-    _get_layer_or_404(layer_id, db)
-    updates = {k: v for k, v in body.model_dump().items() if v is not None}
+def update_layer(layer_id: int, body: LayerUpdate, db: sqlite3.Connection = Depends(get_writer)):
+    updates = {
+        k: v for k in _LAYER_UPDATE_FIELDS if (v := getattr(body, k)) is not None
+    }
     if not updates:
-        return _layer_response(_get_layer_or_404(layer_id, db))
-    set_clause = ", ".join(f"{k} = ?" for k in updates)
-    set_clause += ", updated_at = datetime('now')"
-    with db:
-        db.execute(
-            f"UPDATE layers SET {set_clause} WHERE id = ?",
-            (*updates.values(), layer_id),
-        )
-    return _layer_response(_get_layer_or_404(layer_id, db))
+        return _row_to_layer_dict(_get_layer_or_404(layer_id, db))
+    with transaction(db):
+        row = db.execute(
+            _UPDATE_LAYER_SQL[tuple(updates)], (*updates.values(), layer_id)
+        ).fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail=f"Layer {layer_id} not found")
+    wfs_service.invalidate_metadata()
+    return _row_to_layer_dict(row)
 
 
 # ── Delete ────────────────────────────────────────────────────────────────────
 
 @router.delete("/layers/{layer_id}", status_code=204)
-def delete_layer(layer_id: int, db: sqlite3.Connection = Depends(get_db)):
+def delete_layer(layer_id: int, db: sqlite3.Connection = Depends(get_writer)):
     _get_layer_or_404(layer_id, db)
-    with db:
-        db.execute("DELETE FROM layers WHERE id = ?", (layer_id,))
+    with transaction(db):
+        db.execute(_SQL_DELETE_LAYER, (layer_id,))
+    wfs_service.invalidate_metadata()
 
 
 # ── Feature preview (GeoJSON) ─────────────────────────────────────────────────
@@ -106,31 +124,23 @@ def delete_layer(layer_id: int, db: sqlite3.Connection = Depends(get_db)):
 def feature_preview(
     layer_id: int,
     max: int = Query(default=1000, le=5000),
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_reader),
 ):
     _get_layer_or_404(layer_id, db)
-    rows = db.execute(
-        "SELECT * FROM features WHERE layer_id = ? LIMIT ?", (layer_id, max)
-    ).fetchall()
+    rows = db.execute(_SQL_PREVIEW_FEATURES, (layer_id, max)).fetchall()
 
+    # Stored properties are already JSON text, so each feature is spliced
+    # together as bytes rather than parsed and re-encoded.
     features = []
-    for row in rows:
-        feat = Feature.from_row(row)
-        geom_json = None
-        if feat.geometry:
-            try:
-                geom = wkb_to_geom(bytes(feat.geometry))
-                geom_json = geom_to_geojson(geom)
-            except Exception:
-                pass
-        features.append({
-            "type": "Feature",
-            "id": feat.fid,
-            "geometry": geom_json,
-            "properties": feat.properties,
-        })
-
-    return JSONResponse({
-        "type": "FeatureCollection",
-        "features": features,
-    })
+    geoms = wkbs_to_geoms([row["geometry"] for row in rows])
+    for row, geom_text in zip(rows, geoms_to_geojson_text(geoms)):
+        geom_json = geom_text.encode() if geom_text is not None else b"null"
+        features.append(
+            b'{"type":"Feature","id":' + orjson.dumps(row["fid"])
+            + b',"geometry":' + geom_json
+            + b',"properties":' + wfs_service.properties_json(row["properties"])
+            + b"}"
+        )
+
+    body = b'{"type":"FeatureCollection","features":[' + b",".join(features) + b"]}"
+    return Response(content=body, media_type="application/json")
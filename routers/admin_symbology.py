@@ -1,110 +1,113 @@
 import sqlite3
 from fastapi import APIRouter, Depends, HTTPException
 
-from database import get_db
+from database import get_reader, get_writer, transaction
 from models.api_models import SymbologyRuleCreate, SymbologyRuleResponse, SymbologyReorderRequest
-from models.db_models import SymbologyRule
 
 router = APIRouter()
 
+_SQL_CHECK_LAYER = "SELECT id FROM layers WHERE id = ?"
+_SQL_LIST_RULES = "SELECT * FROM symbology_rules WHERE layer_id = ? ORDER BY rule_order ASC"
+_SQL_INSERT_RULE = """INSERT INTO symbology_rules
+    (layer_id, rule_order, label, filter_field, filter_operator, filter_value,
+     fill_color, fill_opacity, stroke_color, stroke_width, point_radius, is_default)
+    VALUES (?,?,?,?,?,?,?,?,?,?,?,?)"""
+_SQL_INSERT_RULE_RETURNING = _SQL_INSERT_RULE + " RETURNING *"
+_SQL_UPDATE_RULE = """UPDATE symbology_rules SET
+    rule_order=?, label=?, filter_field=?, filter_operator=?, filter_value=?,
+    fill_color=?, fill_opacity=?, stroke_color=?, stroke_width=?, point_radius=?, is_default=?
+    WHERE id = ? AND layer_id = ?
+    RETURNING *"""
+_SQL_DELETE_LAYER_RULES = "DELETE FROM symbology_rules WHERE layer_id = ?"
+_SQL_DELETE_RULE = "DELETE FROM symbology_rules WHERE id = ? AND layer_id = ?"
+_SQL_REORDER_RULE = "UPDATE symbology_rules SET rule_order = ? WHERE id = ? AND layer_id = ?"
+
 
 def _get_layer_or_404(layer_id: int, db: sqlite3.Connection):
-    if not db.execute("SELECT id FROM layers WHERE id = ?", (layer_id,)).fetchone():
+    if not db.execute(_SQL_CHECK_LAYER, (layer_id,)).fetchone():
         raise HTTPException(status_code=404, detail=f"Layer {layer_id} not found")
 
 
-def _rule_response(rule: SymbologyRule) -> dict:
+def _row_to_rule_dict(row: sqlite3.Row) -> dict:
+    """Build the SymbologyRuleResponse payload straight from a symbology_rules row."""
     return {
-        "id": rule.id,
-        "layer_id": rule.layer_id,
-        "rule_order": rule.rule_order,
-        "label": rule.label,
-        "filter_field": rule.filter_field,
-        "filter_operator": rule.filter_operator,
-        "filter_value": rule.filter_value,
-        "fill_color": rule.fill_color,
-        "fill_opacity": rule.fill_opacity,
-        "stroke_color": rule.stroke_color,
-        "stroke_width": rule.stroke_width,
-        "point_radius": rule.point_radius,
-        "is_default": rule.is_default,
+        "id": row["id"],
+        "layer_id": row["layer_id"],
+        "rule_order": row["rule_order"],
+        "label": row["label"],
+        "filter_field": row["filter_field"],
+        "filter_operator": row["filter_operator"],
+        "filter_value": row["filter_value"],
+        "fill_color": row["fill_color"],
+        "fill_opacity": row["fill_opacity"],
+        "stroke_color": row["stroke_color"],
+        "stroke_width": row["stroke_width"],
+        "point_radius": row["point_radius"],
+        "is_default": bool(row["is_default"]),
     }
 
 
+def _rules_for_layer(layer_id: int, db: sqlite3.Connection) -> list[dict]:
+    rows = db.execute(_SQL_LIST_RULES, (layer_id,)).fetchall()
+    return [_row_to_rule_dict(r) for r in rows]
+
+
 # ── List ──────────────────────────────────────────────────────────────────────
 
 @router.get("/layers/{layer_id}/symbology", response_model=list[SymbologyRuleResponse])
-def list_rules(layer_id: int, db: sqlite3.Connection = Depends(get_db)):
+def list_rules(layer_id: int, db: sqlite3.Connection = Depends(get_reader)):
     _get_layer_or_404(layer_id, db)
-    rows = db.execute(
-        "SELECT * FROM symbology_rules WHERE layer_id = ? ORDER BY rule_order ASC",
-        (layer_id,),
-    ).fetchall()
-    return [_rule_response(SymbologyRule.from_row(r)) for r in rows]
+    return _rules_for_layer(layer_id, db)
 
 
 # ── Create ────────────────────────────────────────────────────────────────────
 
 @router.post("/layers/{layer_id}/symbology", response_model=SymbologyRuleResponse, status_code=201)
-def create_rule(layer_id: int, body: SymbologyRuleCreate, db: sqlite3.Connection = Depends(get_db)):
+def create_rule(layer_id: int, body: SymbologyRuleCreate, db: sqlite3.Connection = Depends(get_writer)):
     _get_layer_or_404(layer_id, db)
-    with db:
-        cur = db.execute(
-            """INSERT INTO symbology_rules
-               (layer_id, rule_order, label, filter_field, filter_operator, filter_value,
-                fill_color, fill_opacity, stroke_color, stroke_width, point_radius, is_default)
-               VALUES (?,?,?,?,?,?,?,?,?,?,?,?)""",
+    with transaction(db):
+        row = db.execute(
+            _SQL_INSERT_RULE_RETURNING,
             (
                 layer_id, body.rule_order, body.label, body.filter_field,
                 body.filter_operator, body.filter_value,
                 body.fill_color, body.fill_opacity, body.stroke_color,
                 body.stroke_width, body.point_radius, int(body.is_default),
             ),
-        )
-    row = db.execute("SELECT * FROM symbology_rules WHERE id = ?", (cur.lastrowid,)).fetchone()
-    return _rule_response(SymbologyRule.from_row(row))
+        ).fetchone()
+    return _row_to_rule_dict(row)
 
 
 # ── Bulk replace ──────────────────────────────────────────────────────────────
 
 @router.put("/layers/{layer_id}/symbology", response_model=list[SymbologyRuleResponse])
-def replace_rules(layer_id: int, body: list[SymbologyRuleCreate], db: sqlite3.Connection = Depends(get_db)):
+def replace_rules(layer_id: int, body: list[SymbologyRuleCreate], db: sqlite3.Connection = Depends(get_writer)):
     _get_layer_or_404(layer_id, db)
-    with db:
-        db.execute("DELETE FROM symbology_rules WHERE layer_id = ?", (layer_id,))
-        for i, rule in enumerate(body):
-            db.execute(
-                """INSERT INTO symbology_rules
-                   (layer_id, rule_order, label, filter_field, filter_operator, filter_value,
-                    fill_color, fill_opacity, stroke_color, stroke_width, point_radius, is_default)
-                   VALUES (?,?,?,?,?,?,?,?,?,?,?,?)""",
-                (
-                    layer_id, i, rule.label, rule.filter_field,
-                    rule.filter_operator, rule.filter_value,
-                    rule.fill_color, rule.fill_opacity, rule.stroke_color,
-                    rule.stroke_width, rule.point_radius, int(rule.is_default),
-                ),
-            )
-    return list_rules(layer_id, db)
+    rows = [
+        (
+            layer_id, i, rule.label, rule.filter_field,
+            rule.filter_operator, rule.filter_value,
+            rule.fill_color, rule.fill_opacity, rule.stroke_color,
+            rule.stroke_width, rule.point_radius, int(rule.is_default),
+        )
+        for i, rule in enumerate(body)
+    ]
+    with transaction(db):
+        db.execute(_SQL_DELETE_LAYER_RULES, (layer_id,))
+        db.executemany(_SQL_INSERT_RULE, rows)
+    return _rules_for_layer(layer_id, db)
 
 
 # ── Update single ─────────────────────────────────────────────────────────────
 
 @router.put("/layers/{layer_id}/symbology/{rule_id}", response_model=SymbologyRuleResponse)
 def update_rule(
-    layer_id: int, rule_id: int, body: SymbologyRuleCreate, db: sqlite3.Connection = Depends(get_db)
+    layer_id: int, rule_id: int, body: SymbologyRuleCreate, db: sqlite3.Connection = Depends(get_writer)
 ):
     _get_layer_or_404(layer_id, db)
-    if not db.execute(
-        "SELECT id FROM symbology_rules WHERE id = ? AND layer_id = ?", (rule_id, layer_id)
-    ).fetchone():
-        raise HTTPException(status_code=404, detail=f"Rule {rule_id} not found")
-    with db:
-        db.execute(
-            """UPDATE symbology_rules SET
-               rule_order=?, label=?, filter_field=?, filter_operator=?, filter_value=?,
-               fill_color=?, fill_opacity=?, stroke_color=?, stroke_width=?, point_radius=?, is_default=?
-               WHERE id = ? AND layer_id = ?""",
+    with transaction(db):
+        row = db.execute(
+            _SQL_UPDATE_RULE,
             (
                 body.rule_order, body.label, body.filter_field,
                 body.filter_operator, body.filter_value,
@@ -112,33 +115,31 @@ def update_rule(
                 body.stroke_width, body.point_radius, int(body.is_default),
                 rule_id, layer_id,
             ),
-        )
-    row = db.execute("SELECT * FROM symbology_rules WHERE id = ?", (rule_id,)).fetchone()
-    return _rule_response(SymbologyRule.from_row(row))
+        ).fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail=f"Rule {rule_id} not found")
+    return _row_to_rule_dict(row)
 
 
 # ── Delete ────────────────────────────────────────────────────────────────────
 
 @router.delete("/layers/{layer_id}/symbology/{rule_id}", status_code=204)
-def delete_rule(layer_id: int, rule_id: int, db: sqlite3.Connection = Depends(get_db)):
+def delete_rule(layer_id: int, rule_id: int, db: sqlite3.Connection = Depends(get_writer)):
     _get_layer_or_404(layer_id, db)
-    with db:
-        db.execute(
-            "DELETE FROM symbology_rules WHERE id = ? AND layer_id = ?", (rule_id, layer_id)
-        )
+    with transaction(db):
+        db.execute(_SQL_DELETE_RULE, (rule_id, layer_id))
 
 
 # ── Reorder ───────────────────────────────────────────────────────────────────
 
 @router.post("/layers/{layer_id}/symbology/reorder", response_model=list[SymbologyRuleResponse])
 def reorder_rules(
-    layer_id: int, body: SymbologyReorderRequest, db: sqlite3.Connection = Depends(get_db)
+    layer_id: int, body: SymbologyReorderRequest, db: sqlite3.Connection = Depends(get_writer)
 ):
     _get_layer_or_404(layer_id, db)
-    with db:
-        for i, rule_id in enumerate(body.order):
-            db.execute(
-                "UPDATE symbology_rules SET rule_order = ? WHERE id = ? AND layer_id = ?",
-                (i, rule_id, layer_id),
-            )
-    return list_rules(layer_id, db)
+    with transaction(db):
+        db.executemany(
+            _SQL_REORDER_RULE,
+            [(i, rule_id, layer_id) for i, rule_id in enumerate(body.order)],
+        )
+    return _rules_for_layer(layer_id, db)
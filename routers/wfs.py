@@ -5,55 +5,46 @@ Handles KVP (Key-Value Pair) GET/POST requests for:
 """
 from __future__ import annotations
 
+import re
 import sqlite3
-from typing import Optional
+from tempfile import SpooledTemporaryFile
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.responses import JSONResponse, Response
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 
 from config import settings
-from database import get_db
+from database import get_reader, writer
 from services import wfs_service, transaction_service
+from services.geometry_service import clear_gml_cache
 
 router = APIRouter()
 
 _GML_CONTENT_TYPE = "application/gml+xml; version=3.2; charset=UTF-8"
 _XML_CONTENT_TYPE = "application/xml; charset=UTF-8"
 
+# EPSG:4326 in any of its spellings (EPSG:4326, urn:ogc:def:crs:EPSG::4326,
+# http://www.opengis.net/def/crs/EPSG/0/4326, ...).  CRS84 never matches.
+_EPSG4326_RE = re.compile(r"\b4326$")
+
+# Transaction bodies beyond this size are spooled to disk while being received.
+_SPOOL_MAX_MEMORY = 1 << 20   # 1 MiB
+
 
 @router.get("/wfs")
 @router.post("/wfs")
 async def wfs_endpoint(
     raw_request: Request,
-    SERVICE: Optional[str] = Query(default=None),
-    service: Optional[str] = Query(default=None),
-    VERSION: Optional[str] = Query(default=None),
-    version: Optional[str] = Query(default=None),
-    REQUEST: Optional[str] = Query(default=None),
-    request: Optional[str] = Query(default=None),
-    TYPENAMES: Optional[str] = Query(default=None),
-    TypeNames: Optional[str] = Query(default=None),
-    typenames: Optional[str] = Query(default=None),
-    TYPENAME: Optional[str] = Query(default=None),
-    TypeName: Optional[str] = Query(default=None),
-    BBOX: Optional[str] = Query(default=None),
-    bbox: Optional[str] = Query(default=None),
-    COUNT: Optional[int] = Query(default=None),
-    count: Optional[int] = Query(default=None),
-    STARTINDEX: int = Query(default=0),
-    startindex: int = Query(default=0),
-    OUTPUTFORMAT: Optional[str] = Query(default=None),
-    outputFormat: Optional[str] = Query(default=None),
-    outputformat: Optional[str] = Query(default=None),
-    db: sqlite3.Connection = Depends(get_db),
+    db: sqlite3.Connection = Depends(get_reader),
 ):
-    # Normalise case-insensitive KVP params
-    req = (REQUEST or request or "").strip()
-    type_names = TYPENAMES or TypeNames or typenames or TYPENAME or TypeName
-    bbox_str = BBOX or bbox
-    req_count = COUNT or count
-    req_startindex = STARTINDEX or startindex
-    output_fmt = OUTPUTFORMAT or outputFormat or outputformat or ""
+    # KVP parameter names are case-insensitive: normalise them in one pass
+    params = {k.lower(): v for k, v in raw_request.query_params.multi_items()}
+    req = params.get("request", "").strip()
+    type_names = params.get("typenames") or params.get("typename")
+    bbox_str = params.get("bbox")
+    req_count = _int_param(params, "count") or None
+    req_startindex = _int_param(params, "startindex") or 0
+    output_fmt = params.get("outputformat", "")
 
     req_upper = req.upper()
 
@@ -61,18 +52,23 @@ async def wfs_endpoint(
     if raw_request.method == "POST" and (req_upper == "TRANSACTION" or req_upper == ""):
         content_type = (raw_request.headers.get("content-type") or "").lower()
         if "xml" in content_type or req_upper == "TRANSACTION":
-            body = await raw_request.body()
-            if body and (req_upper == "TRANSACTION" or b"Transaction" in body):
-                xml = transaction_service.execute_transaction(body, db)
+            body, head = await _spool_body(raw_request)
+            if head and (req_upper == "TRANSACTION" or b"Transaction" in head):
+                xml = await run_in_threadpool(_execute_transaction, body)
                 return Response(content=xml, media_type=_XML_CONTENT_TYPE)
+            body.close()
 
     if req_upper == "GETCAPABILITIES" or req == "":
-        xml = wfs_service.build_capabilities(db)
-        return Response(content=xml, media_type=_XML_CONTENT_TYPE)
+        etag, xml = wfs_service.get_capabilities(db)
+        if _etag_matches(raw_request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=xml, media_type=_XML_CONTENT_TYPE, headers={"ETag": etag})
 
     elif req_upper == "DESCRIBEFEATURETYPE":
-        xml = wfs_service.build_describe(type_names, db)
-        return Response(content=xml, media_type=_XML_CONTENT_TYPE)
+        etag, xml = wfs_service.get_describe(type_names, db)
+        if _etag_matches(raw_request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=xml, media_type=_XML_CONTENT_TYPE, headers={"ETag": etag})
 
     elif req_upper == "GETFEATURE":
         if not type_names:
@@ -90,7 +86,7 @@ async def wfs_endpoint(
                 startindex=req_startindex,
                 max_features=settings.max_features_per_request,
             )
-            return JSONResponse(result)
+            return Response(content=result, media_type="application/json")
         else:
             gml = wfs_service.build_get_feature_gml(
                 typenames=type_names,
@@ -100,7 +96,7 @@ async def wfs_endpoint(
                 startindex=req_startindex,
                 max_features=settings.max_features_per_request,
             )
-            return Response(content=gml, media_type=_GML_CONTENT_TYPE)
+            return StreamingResponse(gml, media_type=_GML_CONTENT_TYPE)
 
     elif req_upper == "TRANSACTION":
         raise HTTPException(status_code=400, detail="Transaction requires XML POST body")
@@ -112,25 +108,63 @@ async def wfs_endpoint(
         )
 
 
+async def _spool_body(raw_request: Request) -> tuple[SpooledTemporaryFile, bytes]:
+    """Receive the request body into a spooled file rather than one bytes object.
+
+    Returns the file, rewound, and the first chunk so callers can sniff the
+    root element without reading the body back.
+    """
+    body = SpooledTemporaryFile(max_size=_SPOOL_MAX_MEMORY)
+    head = b""
+    async for chunk in raw_request.stream():
+        if not head:
+            head = chunk
+        body.write(chunk)
+    body.seek(0)
+    return body, head
+
+
+def _execute_transaction(body: SpooledTemporaryFile) -> str:
+    with body, writer() as db:
+        xml = transaction_service.execute_transaction(body, db)
+    wfs_service.invalidate_metadata()
+    clear_gml_cache()
+    return xml
+
+
+def _etag_matches(raw_request: Request, etag: str) -> bool:
+    if_none_match = raw_request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+def _int_param(params: dict[str, str], name: str) -> int | None:
+    value = params.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name.upper()} must be an integer: '{value}'")
+
+
 def _parse_bbox(bbox_str: str) -> tuple[float, float, float, float]:
     """Parse 'minx,miny,maxx,maxy[,CRS]' string.
 
     WFS 2.0.0: when the CRS suffix indicates EPSG:4326 (lat/lon axis order),
     the values arrive as minLat,minLon,maxLat,maxLon — swap to minx,miny,maxx,maxy.
     """
-    parts = bbox_str.split(",")
-    if len(parts) < 4:
-        raise HTTPException(status_code=400, detail=f"Invalid BBOX: '{bbox_str}'")
     try:
-        v0, v1, v2, v3 = float(parts[0]), float(parts[1]), float(parts[2]), float(parts[3])
+        a, b, c, d, *crs = bbox_str.split(",", 4)
+        v0, v1, v2, v3 = map(float, (a, b, c, d))
     except ValueError:
-        raise HTTPException(status_code=400, detail=f"BBOX values must be numeric: '{bbox_str}'")
+        raise HTTPException(status_code=400, detail=f"Invalid BBOX: '{bbox_str}'")
 
     # If a CRS is appended, check for EPSG:4326 axis swap (lat/lon → lon/lat)
-    if len(parts) >= 5:
-        crs = parts[4].strip()
-        if "4326" in crs and ("EPSG" in crs or "CRS84" not in crs):
-            # Values are lat,lon order — swap to lon,lat for internal use
-            return v1, v0, v3, v2
+    if crs and _EPSG4326_RE.search(crs[0].strip()):
+        # Values are lat,lon order — swap to lon,lat for internal use
+        return v1, v0, v3, v2
 
     return v0, v1, v2, v3
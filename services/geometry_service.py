@@ -4,19 +4,23 @@ and parsing, CRS reprojection via pyproj.
 """
 from __future__ import annotations
 
+import functools
+import itertools
 import json
 import re
-import xml.etree.ElementTree as ET
-from typing import Any
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Sequence
 
+import numpy as np
+import orjson
+import shapely
 import shapely.geometry
-import shapely.ops
-import shapely.wkb
+from lxml import etree as ET
 from shapely.geometry.base import BaseGeometry
 from pyproj import Transformer, CRS
 
-_GML_NS = "http://www.opengis.net/gml/3.2"
-
+from config import settings
 
 # ── CRS / reprojection ────────────────────────────────────────────────────────
 
@@ -24,6 +28,13 @@ def make_transformer(from_srid: int, to_srid: int = 4326) -> Transformer | None:
     """Return a pyproj Transformer or None if source is already WGS84."""
     if from_srid == to_srid:
         return None
+    return _cached_transformer(from_srid, to_srid)
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_transformer(from_srid: int, to_srid: int) -> Transformer:
+    # Building a Transformer (CRS lookups + PROJ pipeline) costs far more than
+    # using one; pyproj Transformers are safe to share across threads.
     src = CRS.from_epsg(from_srid)
     dst = CRS.from_epsg(to_srid)
     return Transformer.from_crs(src, dst, always_xy=True)
@@ -31,17 +42,54 @@ def make_transformer(from_srid: int, to_srid: int = 4326) -> Transformer | None:
 
 def reproject_geom(geom: BaseGeometry, transformer: Transformer) -> BaseGeometry:
     """Reproject a Shapely geometry using the given transformer."""
-    return shapely.ops.transform(transformer.transform, geom)
+    return reproject_many([geom], transformer)[0]
+
+
+def reproject_many(geoms: Sequence[BaseGeometry], transformer: Transformer) -> list[BaseGeometry]:
+    """Reproject many geometries with one PROJ call over all their vertices.
+
+    Only X/Y go through the transformer (every SRID handled here is 2-D);
+    Z values are carried over unchanged.
+    """
+    arr = np.array(geoms, dtype=object)
+    coords = shapely.get_coordinates(arr, include_z=True)
+    if len(coords):
+        coords[:, 0], coords[:, 1] = transformer.transform(coords[:, 0], coords[:, 1])
+        arr = shapely.set_coordinates(arr, coords)
+    return arr.tolist()
 
 
 # ── WKB / bbox helpers ────────────────────────────────────────────────────────
 
 def geom_to_wkb(geom: BaseGeometry) -> bytes:
-    return shapely.wkb.dumps(geom, include_srid=False)
+    return shapely.to_wkb(geom, include_srid=False)
 
 
 def wkb_to_geom(wkb: bytes) -> BaseGeometry:
-    return shapely.wkb.loads(wkb)
+    return shapely.from_wkb(wkb)
+
+
+_WKB_TYPES = {
+    1: "Point",
+    2: "LineString",
+    3: "Polygon",
+    4: "MultiPoint",
+    5: "MultiLineString",
+    6: "MultiPolygon",
+    7: "GeometryCollection",
+}
+
+
+def wkb_geom_type(header: bytes) -> str:
+    """Geometry type named by the first 5 bytes of a WKB blob, without decoding it.
+
+    Handles both byte orders, EWKB Z/M/SRID flags and ISO 1000-offset codes;
+    returns "" for anything unrecognised.
+    """
+    if len(header) < 5:
+        return ""
+    code = int.from_bytes(header[1:5], "little" if header[0] == 1 else "big")
+    return _WKB_TYPES.get((code & 0x0FFFFFFF) % 1000, "")
 
 
 def bbox_from_geom(geom: BaseGeometry) -> tuple[float, float, float, float]:
@@ -49,106 +97,315 @@ def bbox_from_geom(geom: BaseGeometry) -> tuple[float, float, float, float]:
     return geom.bounds  # type: ignore[return-value]
 
 
+# Batch variants: one GEOS call for a whole list instead of one per geometry.
+
+def geoms_to_wkbs(geoms: Sequence[BaseGeometry]) -> list[bytes]:
+    return shapely.to_wkb(np.array(geoms, dtype=object), include_srid=False).tolist()
+
+
+def wkbs_to_geoms(wkbs: Sequence[bytes | None]) -> list[BaseGeometry | None]:
+    """Decode many WKB blobs; NULL or unparseable entries come back as None."""
+    return shapely.from_wkb(np.array(wkbs, dtype=object), on_invalid="ignore").tolist()
+
+
+def bboxes_from_geoms(geoms: Sequence[BaseGeometry]) -> np.ndarray:
+    """Return an (N, 4) array of [minx, miny, maxx, maxy], one row per geometry."""
+    return shapely.bounds(np.array(geoms, dtype=object))
+
+
+def union_bbox(bboxes: np.ndarray) -> list[float] | None:
+    """Combined [minx, miny, maxx, maxy] of an (N, 4) bounds array.
+
+    Rows of empty geometries are NaN and are ignored; None if nothing is left.
+    """
+    bboxes = bboxes[~np.isnan(bboxes).any(axis=1)]
+    if not len(bboxes):
+        return None
+    mins = bboxes[:, :2].min(axis=0)
+    maxs = bboxes[:, 2:].max(axis=0)
+    return [*mins.tolist(), *maxs.tolist()]
+
+
 # ── GeoJSON helper ────────────────────────────────────────────────────────────
 
 def geom_to_geojson(geom: BaseGeometry) -> dict[str, Any]:
-    return shapely.geometry.mapping(geom)
+    """GeoJSON geometry dict whose coordinates are NumPy arrays where possible.
+
+    Serialise with orjson.OPT_SERIALIZE_NUMPY; that avoids building the nested
+    tuple trees shapely.geometry.mapping produces for long rings.
+    """
+    gtype = geom.geom_type
+    if geom.is_empty or gtype not in _ARRAY_GEOJSON_TYPES:
+        return shapely.geometry.mapping(geom)
+    z = geom.has_z
+    if gtype == "LineString" or gtype == "MultiPoint":
+        coords = shapely.get_coordinates(geom, include_z=z)
+    elif gtype == "Polygon":
+        coords = _ring_arrays(geom, z)
+    elif gtype == "MultiLineString":
+        coords = _split_coords(shapely.get_parts(geom), z)
+    else:  # MultiPolygon
+        coords = [_ring_arrays(p, z) for p in shapely.get_parts(geom)]
+    return {"type": gtype, "coordinates": coords}
+
+
+def geoms_to_geojson_text(geoms: Sequence[BaseGeometry | None]) -> list[str | None]:
+    """GeoJSON geometry text for many geometries; None where there is none.
+
+    Non-empty 2D geometries go through one vectorized shapely.to_geojson
+    call.  GEOS drops Z and rejects empty points there, so those (and
+    anything it fails on) fall back to geom_to_geojson one at a time.
+    """
+    arr = np.array(geoms, dtype=object)
+    out: list[str | None] = [None] * len(arr)
+    if not len(arr):
+        return out
+    fast = ~(shapely.is_missing(arr) | shapely.is_empty(arr) | shapely.has_z(arr))
+    if fast.any():
+        try:
+            for i, text in zip(np.flatnonzero(fast).tolist(), shapely.to_geojson(arr[fast]).tolist()):
+                out[i] = text
+        except Exception:
+            fast[:] = False
+    for i in np.flatnonzero(~fast).tolist():
+        geom = arr[i]
+        if geom is None:
+            continue
+        try:
+            out[i] = orjson.dumps(geom_to_geojson(geom), option=orjson.OPT_SERIALIZE_NUMPY).decode()
+        except Exception:
+            pass
+    return out
+
+
+_ARRAY_GEOJSON_TYPES = frozenset(
+    {"LineString", "MultiPoint", "Polygon", "MultiLineString", "MultiPolygon"}
+)
+
+
+def _ring_arrays(polygon: BaseGeometry, include_z: bool) -> list[np.ndarray]:
+    return _split_coords(shapely.get_rings(polygon), include_z)
+
+
+def _split_coords(geoms: np.ndarray, include_z: bool) -> list[np.ndarray]:
+    # One get_coordinates call for all parts, then slice per part by index
+    coords, index = shapely.get_coordinates(geoms, include_z=include_z, return_index=True)
+    if not len(coords):
+        return []
+    return np.split(coords, np.flatnonzero(np.diff(index)) + 1)
 
 
 # ── GML 3.2 serialization ─────────────────────────────────────────────────────
 
-def wkb_to_gml32(wkb: bytes, srid: int = 4326) -> str:
+# GetFeature re-serves the same geometries across pages and overlapping
+# BBOX requests.  The output depends only on the WKB bytes and SRID, so an
+# edited feature simply misses; WFS-T still clears the cache so replaced
+# geometries do not linger.  The cache is bounded by the bytes it holds,
+# settings.gml_cache_max_bytes, counting each entry's WKB key, GML value and
+# a fixed allowance for the objects around them; large geometries bypass it.
+_GML_CACHE_MAX_WKB = 4096
+_GML_CACHE_ENTRY_OVERHEAD = 200
+
+_gml_cache: OrderedDict[tuple[bytes, int], bytes] = OrderedDict()
+_gml_cache_bytes = 0
+_gml_cache_lock = threading.Lock()
+
+# Byte length of an XYZM point's WKB; any longer blob is not a point.
+_MAX_POINT_WKB = 37
+
+
+def wkb_to_gml32(wkb: bytes, srid: int = 4326) -> bytes:
+    """Serialise a WKB geometry as a GML 3.2 fragment, UTF-8 encoded."""
+    if len(wkb) > _GML_CACHE_MAX_WKB or settings.gml_cache_max_bytes <= 0:
+        return _wkb_to_gml32(wkb, srid)
+    key = (wkb, srid)
+    with _gml_cache_lock:
+        gml = _gml_cache.get(key)
+        if gml is not None:
+            _gml_cache.move_to_end(key)
+            return gml
+    gml = _wkb_to_gml32(wkb, srid)
+    _cache_gml(key, gml)
+    return gml
+
+
+def wkbs_to_gml32(wkbs: Sequence[bytes | None], srid: int = 4326) -> list[bytes | None]:
+    """wkb_to_gml32 over a batch; None where a blob is NULL or unusable.
+
+    Points, the bulk of most layers, are decoded and have their coordinates
+    pulled out in single vectorized calls, then formatted without a GEOS
+    round-trip per feature.  Only blobs short enough to be a point are
+    decoded up front; everything else goes through the cached per-geometry
+    path, where the posList work dominates, and is decoded only there.
+    """
+    out: list[bytes | None] = [None] * len(wkbs)
+    short_idx = [i for i, wkb in enumerate(wkbs) if wkb and len(wkb) <= _MAX_POINT_WKB]
+    if short_idx:
+        points = shapely.from_wkb(np.array([wkbs[i] for i in short_idx], dtype=object), on_invalid="ignore")
+        ok = (shapely.get_type_id(points) == 0) & ~shapely.is_empty(points)
+        srs = f"urn:ogc:def:crs:EPSG::{srid}"
+        head = f'<gml:Point srsName="{srs}"><gml:pos>'
+        tail = "</gml:pos></gml:Point>"
+        coords = shapely.get_coordinates(points[ok])
+        if srid == 4326:
+            coords = coords[:, ::-1]
+        for i, (a, b) in zip(itertools.compress(short_idx, ok.tolist()), coords.tolist()):
+            out[i] = f"{head}{a!r} {b!r}{tail}".encode()
+    for i, wkb in enumerate(wkbs):
+        if wkb and out[i] is None:
+            try:
+                out[i] = wkb_to_gml32(wkb, srid)
+            except Exception:
+                pass
+    return out
+
+
+def clear_gml_cache() -> None:
+    global _gml_cache_bytes
+    with _gml_cache_lock:
+        _gml_cache.clear()
+        _gml_cache_bytes = 0
+
+
+def _cache_gml(key: tuple[bytes, int], gml: bytes) -> None:
+    """Store one entry, evicting the least recently used beyond the byte budget."""
+    global _gml_cache_bytes
+    limit = settings.gml_cache_max_bytes
+    with _gml_cache_lock:
+        if key in _gml_cache:
+            return
+        _gml_cache[key] = gml
+        _gml_cache_bytes += len(key[0]) + len(gml) + _GML_CACHE_ENTRY_OVERHEAD
+        while _gml_cache_bytes > limit and _gml_cache:
+            (old_wkb, _), old_gml = _gml_cache.popitem(last=False)
+            _gml_cache_bytes -= len(old_wkb) + len(old_gml) + _GML_CACHE_ENTRY_OVERHEAD
+
+
+def _wkb_to_gml32(wkb: bytes, srid: int) -> bytes:
     geom = wkb_to_geom(wkb)
     srs = f"urn:ogc:def:crs:EPSG::{srid}"
     # EPSG:4326 axis order is lat,lon (Y,X) per OGC spec — swap X and Y in output.
     # All other CRS use X,Y as declared.
     swap = (srid == 4326)
-    return _geom_to_gml(geom, srs, swap)
+    return _geom_to_gml(geom, srs, swap).encode()
 
 
 def _geom_to_gml(geom: BaseGeometry, srs: str, swap: bool = False) -> str:
+    out: list[str] = []
+    _write_geom(out, geom, srs, _YX if swap else _XY)
+    return "".join(out)
+
+
+# The writers below append fragments to one shared list; the caller joins it
+# once, instead of each nesting level building and joining its own strings.
+# The axis order is chosen once per geometry by passing the matching
+# coordinate formatter down, rather than a swap flag tested at every level.
+
+def _write_geom(out: list[str], geom: BaseGeometry, srs: str, axes: _AxisOrder) -> None:
     gtype = geom.geom_type
     if gtype == "Point":
-        return _point_gml(geom, srs, swap)
+        _point_gml(out, geom, srs, axes)
     elif gtype == "LineString":
-        return _linestring_gml(geom, srs, swap)
+        _linestring_gml(out, geom, srs, axes)
     elif gtype == "Polygon":
-        return _polygon_gml(geom, srs, swap)
+        _polygon_gml(out, geom, srs, axes)
     elif gtype == "MultiPoint":
-        return _multi_gml(geom, srs, swap, "MultiPoint", "pointMember", _point_gml)
+        _multi_gml(out, geom, srs, axes, "MultiPoint", "pointMember", _point_gml)
     elif gtype == "MultiLineString":
-        return _multi_gml(geom, srs, swap, "MultiCurve", "curveMember", _linestring_gml)
+        _multi_gml(out, geom, srs, axes, "MultiCurve", "curveMember", _linestring_gml)
     elif gtype == "MultiPolygon":
-        return _multi_gml(geom, srs, swap, "MultiSurface", "surfaceMember", _polygon_gml)
+        _multi_gml(out, geom, srs, axes, "MultiSurface", "surfaceMember", _polygon_gml)
     elif gtype == "GeometryCollection":
-        members = "".join(
-            f"<gml:geometryMember>{_geom_to_gml(g, srs, swap)}</gml:geometryMember>"
-            for g in geom.geoms
-        )
-        return f'<gml:MultiGeometry srsName="{srs}">{members}</gml:MultiGeometry>'
-    raise ValueError(f"Unsupported geometry type: {gtype}")
+        _multi_gml(out, geom, srs, axes, "MultiGeometry", "geometryMember", _write_geom)
+    else:
+        raise ValueError(f"Unsupported geometry type: {gtype}")
+
+
+# Every coordinate, in a pos or a posList, is written with repr: the
+# shortest string that reads back as the same double.
+
+def _xy_coords(geom: BaseGeometry) -> str:
+    return " ".join(map(repr, shapely.get_coordinates(geom).ravel().tolist()))
+
+
+def _yx_coords(geom: BaseGeometry) -> str:
+    return " ".join(map(repr, shapely.get_coordinates(geom)[:, ::-1].ravel().tolist()))
+
 
+# Formats a geometry's 2D coordinates in the axis order of the output CRS
+_AxisOrder = Callable[[BaseGeometry], str]
 
-def _coords_str(coords, swap: bool = False) -> str:
-    if swap:
-        return " ".join(f"{y} {x}" for x, y in coords)
-    return " ".join(f"{x} {y}" for x, y in coords)
+_XY: _AxisOrder = _xy_coords
+_YX: _AxisOrder = _yx_coords
 
 
-def _point_gml(geom: BaseGeometry, srs: str, swap: bool = False) -> str:
-    pos = f"{geom.y} {geom.x}" if swap else f"{geom.x} {geom.y}"
-    return (
-        f'<gml:Point srsName="{srs}">'
-        f"<gml:pos>{pos}</gml:pos>"
-        f"</gml:Point>"
-    )
+def _point_gml(out: list[str], geom: BaseGeometry, srs: str, axes: _AxisOrder) -> None:
+    out.append(f'<gml:Point srsName="{srs}"><gml:pos>{axes(geom)}</gml:pos></gml:Point>')
 
 
-def _linestring_gml(geom: BaseGeometry, srs: str, swap: bool = False) -> str:
-    return (
-        f'<gml:LineString srsName="{srs}">'
-        f"<gml:posList>{_coords_str(geom.coords, swap)}</gml:posList>"
-        f"</gml:LineString>"
-    )
+def _linestring_gml(out: list[str], geom: BaseGeometry, srs: str, axes: _AxisOrder) -> None:
+    out.append(f'<gml:LineString srsName="{srs}"><gml:posList>')
+    out.append(axes(geom))
+    out.append("</gml:posList></gml:LineString>")
 
 
-def _ring_gml(ring, swap: bool = False) -> str:
-    return (
-        f"<gml:LinearRing>"
-        f"<gml:posList>{_coords_str(ring.coords, swap)}</gml:posList>"
-        f"</gml:LinearRing>"
-    )
+def _ring_gml(out: list[str], ring, axes: _AxisOrder) -> None:
+    out.append("<gml:LinearRing><gml:posList>")
+    out.append(axes(ring))
+    out.append("</gml:posList></gml:LinearRing>")
 
 
-def _polygon_gml(geom: BaseGeometry, srs: str, swap: bool = False) -> str:
-    exterior = f"<gml:exterior>{_ring_gml(geom.exterior, swap)}</gml:exterior>"
-    interiors = "".join(
-        f"<gml:interior>{_ring_gml(r, swap)}</gml:interior>" for r in geom.interiors
-    )
-    return f'<gml:Polygon srsName="{srs}">{exterior}{interiors}</gml:Polygon>'
+def _polygon_gml(out: list[str], geom: BaseGeometry, srs: str, axes: _AxisOrder) -> None:
+    out.append(f'<gml:Polygon srsName="{srs}"><gml:exterior>')
+    _ring_gml(out, geom.exterior, axes)
+    out.append("</gml:exterior>")
+    for r in geom.interiors:
+        out.append("<gml:interior>")
+        _ring_gml(out, r, axes)
+        out.append("</gml:interior>")
+    out.append("</gml:Polygon>")
 
 
-def _multi_gml(geom: BaseGeometry, srs: str, swap: bool, tag: str, member_tag: str, part_fn) -> str:
-    members = "".join(
-        f"<gml:{member_tag}>{part_fn(g, srs, swap)}</gml:{member_tag}>"
-        for g in geom.geoms
-    )
-    return f'<gml:{tag} srsName="{srs}">{members}</gml:{tag}>'
+def _multi_gml(
+    out: list[str], geom: BaseGeometry, srs: str, axes: _AxisOrder, tag: str, member_tag: str, part_fn
+) -> None:
+    open_member, close_member = f"<gml:{member_tag}>", f"</gml:{member_tag}>"
+    out.append(f'<gml:{tag} srsName="{srs}">')
+    for g in geom.geoms:
+        out.append(open_member)
+        part_fn(out, g, srs, axes)
+        out.append(close_member)
+    out.append(f"</gml:{tag}>")
 
 
 # ── GML 3.2 parsing (inverse of serialization) ───────────────────────────────
 
-def _gml_tag(local: str) -> str:
-    """Return fully-qualified GML 3.2 tag."""
-    return f"{{{_GML_NS}}}{local}"
+@functools.lru_cache(maxsize=256)
+def _gml_tag(parent_tag: str, local: str) -> str:
+    """Qualify ``local`` with the namespace of ``parent_tag``.
+
+    Child elements are looked up in their geometry's own namespace, so GML
+    3.2, GML 3.1.1 and un-namespaced geometries all parse.
+    """
+    ns, brace, _ = parent_tag.rpartition("}")
+    return f"{ns}{brace}{local}"
+
+
+_EPSG_URN_PREFIX = "urn:ogc:def:crs:EPSG::"
+_EPSG_URN_PREFIX_LEN = len(_EPSG_URN_PREFIX)
+_EPSG_URN_RE = re.compile(r"EPSG::(\d+)")
 
 
 def _parse_srs(elem: ET.Element) -> tuple[int, bool]:
     """Extract SRID and whether axis swap is needed from srsName attribute.
     Returns (srid, swap). Defaults to (4326, True) if no srsName found."""
     srs = elem.get("srsName", "")
-    m = re.search(r"EPSG::(\d+)", srs)
-    srid = int(m.group(1)) if m else 4326
+    if srs.startswith(_EPSG_URN_PREFIX) and srs[_EPSG_URN_PREFIX_LEN:].isdecimal():
+        # Fast path for the URN form this server itself emits
+        srid = int(srs[_EPSG_URN_PREFIX_LEN:])
+    else:
+        m = _EPSG_URN_RE.search(srs)
+        srid = int(m.group(1)) if m else 4326
     swap = (srid == 4326)
     return srid, swap
 
@@ -160,19 +417,17 @@ def _parse_pos(text: str, swap: bool) -> tuple[float, float]:
     return (b, a) if swap else (a, b)
 
 
-def _parse_poslist(text: str, swap: bool) -> list[tuple[float, float]]:
-    """Parse a gml:posList string into a list of (x, y) tuples."""
-    parts = text.strip().split()
-    coords = []
-    for i in range(0, len(parts), 2):
-        a, b = float(parts[i]), float(parts[i + 1])
-        coords.append((b, a) if swap else (a, b))
-    return coords
+def _parse_poslist(text: str, swap: bool) -> np.ndarray:
+    """Parse a gml:posList string into an (N, 2) array of x, y."""
+    # np.array converts every token in C and, unlike np.fromstring, raises on
+    # a malformed number instead of silently truncating.
+    arr = np.array(text.split(), dtype=np.float64).reshape(-1, 2)
+    return arr[:, ::-1] if swap else arr
 
 
 def _find_text(elem: ET.Element, local: str) -> str:
     """Find a GML child element and return its text content."""
-    child = elem.find(_gml_tag(local))
+    child = elem.find(_gml_tag(elem.tag, local))
     if child is None or child.text is None:
         raise ValueError(f"Missing <gml:{local}> element")
     return child.text
@@ -190,23 +445,23 @@ def _parse_linestring(elem: ET.Element, swap: bool) -> BaseGeometry:
     return shapely.geometry.LineString(coords)
 
 
-def _parse_linearring(elem: ET.Element, swap: bool) -> list[tuple[float, float]]:
+def _parse_linearring(elem: ET.Element, swap: bool) -> np.ndarray:
     poslist_text = _find_text(elem, "posList")
     return _parse_poslist(poslist_text, swap)
 
 
 def _parse_polygon(elem: ET.Element, swap: bool) -> BaseGeometry:
-    exterior_elem = elem.find(_gml_tag("exterior"))
+    exterior_elem = elem.find(_gml_tag(elem.tag, "exterior"))
     if exterior_elem is None:
         raise ValueError("Polygon missing <gml:exterior>")
-    ring_elem = exterior_elem.find(_gml_tag("LinearRing"))
+    ring_elem = exterior_elem.find(_gml_tag(elem.tag, "LinearRing"))
     if ring_elem is None:
         raise ValueError("Polygon exterior missing <gml:LinearRing>")
     exterior = _parse_linearring(ring_elem, swap)
 
     holes = []
-    for interior_elem in elem.findall(_gml_tag("interior")):
-        ring = interior_elem.find(_gml_tag("LinearRing"))
+    for interior_elem in elem.findall(_gml_tag(elem.tag, "interior")):
+        ring = interior_elem.find(_gml_tag(elem.tag, "LinearRing"))
         if ring is not None:
             holes.append(_parse_linearring(ring, swap))
 
@@ -215,10 +470,10 @@ def _parse_polygon(elem: ET.Element, swap: bool) -> BaseGeometry:
 
 def _parse_multi(elem: ET.Element, swap: bool, member_tag: str, part_fn) -> list:
     parts = []
-    for member in elem.findall(_gml_tag(member_tag)):
-        child = list(member)
-        if child:
-            parts.append(part_fn(child[0], swap))
+    for member in elem.iterchildren(_gml_tag(elem.tag, member_tag)):
+        child = next(member.iterchildren(ET.Element), None)
+        if child is not None:
+            parts.append(part_fn(child, swap))
     return parts
 
 
@@ -261,6 +516,10 @@ def gml32_to_geom(elem: ET.Element) -> tuple[BaseGeometry, int]:
 
 # ── Attribute type inference ───────────────────────────────────────────────────
 
+_INTEGER, _REAL, _STRING = 1, 2, 4
+_TYPE_BITS = {int: _INTEGER, float: _REAL, str: _STRING, bool: _STRING, type(None): _STRING}
+
+
 def infer_schema(sample_props: list[dict[str, Any]]) -> dict[str, str]:
     """
     Infer attribute types from a sample of property dicts.
@@ -269,31 +528,30 @@ def infer_schema(sample_props: list[dict[str, Any]]) -> dict[str, str]:
     if not sample_props:
         return {}
 
-    fields: dict[str, set[str]] = {}
+    # OR together one bit per value type seen in each field
+    masks: dict[str, int] = {}
+    get_mask = masks.get
     for props in sample_props:
         for k, v in props.items():
-            if k not in fields:
-                fields[k] = set()
-            fields[k].add(_value_type(v))
+            masks[k] = get_mask(k, 0) | (_TYPE_BITS.get(type(v)) or _value_bit(v))
 
     result: dict[str, str] = {}
-    for k, types in fields.items():
-        if types == {"Integer"}:
-            result[k] = "Integer"
-        elif types <= {"Integer", "Real"}:
+    for k, mask in masks.items():
+        if mask & _STRING:
+            result[k] = "String"
+        elif mask & _REAL:
             result[k] = "Real"
         else:
-            result[k] = "String"
+            result[k] = "Integer"
     return result
 
 
-def _value_type(v: Any) -> str:
+def _value_bit(v: Any) -> int:
+    # Fallback for subclasses the exact-type table above does not list
     if isinstance(v, bool):
-        return "String"
+        return _STRING
     if isinstance(v, int):
-        return "Integer"
+        return _INTEGER
     if isinstance(v, float):
-        return "Real"
-    return "String"
-
-
+        return _REAL
+    return _STRING
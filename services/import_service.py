@@ -6,29 +6,46 @@ features table with per-feature bbox columns.
 from __future__ import annotations
 
 import csv
+import io
+import itertools
 import json
-import shutil
+import math
+import queue
 import sqlite3
-import tempfile
+import threading
 import uuid
 import zipfile
+from contextlib import closing
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Iterable, Iterator, TypeVar
 
+import ijson
+import numpy as np
+import orjson
+import shapely
 import shapely.geometry
+from pyproj import Transformer
 from shapely.geometry.base import BaseGeometry
 
+from database import savepoint, transaction
 from models.api_models import ImportResult
 from services.geometry_service import (
-    bbox_from_geom,
-    geom_to_wkb,
+    bboxes_from_geoms,
+    geoms_to_wkbs,
     infer_schema,
     make_transformer,
-    reproject_geom,
+    reproject_many,
+    union_bbox,
+    wkb_geom_type,
 )
 
 
-# ── Public entry point ────────────────────────────────────────────────────────
+# ── Public entry points ───────────────────────────────────────────────────────
+
+# Formats that can be parsed straight from an open file object; Shapefile
+# ZIPs and GeoPackages go through fiona and need a real path on disk.
+FILEOBJ_FORMATS = frozenset({".geojson", ".json", ".csv"})
+
 
 def import_file(
     file_path: Path,
@@ -41,84 +58,171 @@ def import_file(
 ) -> ImportResult:
     ext = file_path.suffix.lower()
 
-    if replace_existing:
-        db.execute("DELETE FROM features WHERE layer_id = ?", (layer_id,))
-
-    if ext in (".geojson", ".json"):
-        result = _import_geojson(file_path, layer_id, db, source_srid)
-    elif ext == ".zip":
-        result = _import_shapefile_zip(file_path, layer_id, db, source_srid)
-    elif ext == ".gpkg":
-        result = _import_geopackage(file_path, layer_id, db, source_srid)
-    elif ext == ".csv":
-        result = _import_csv(file_path, layer_id, db, source_srid, lat_field, lon_field)
-    else:
+    if ext in FILEOBJ_FORMATS:
+        with open(file_path, "rb") as f:
+            return import_file_obj(
+                f, ext, layer_id, db, source_srid, lat_field, lon_field, replace_existing
+            )
+
+    if ext not in (".zip", ".gpkg"):
+        raise ValueError(f"Unsupported file format: {ext}")
+
+    with transaction(db):
+        if replace_existing:
+            _clear_layer(layer_id, db)
+
+        if ext == ".zip":
+            result = _import_shapefile_zip(file_path, layer_id, db, source_srid)
+        else:
+            result = _import_geopackage(file_path, layer_id, db, source_srid)
+    return result
+
+
+def import_file_obj(
+    fileobj: BinaryIO,
+    suffix: str,
+    layer_id: int,
+    db: sqlite3.Connection,
+    source_srid: int = 4326,
+    lat_field: str | None = None,
+    lon_field: str | None = None,
+    replace_existing: bool = False,
+) -> ImportResult:
+    """Import GeoJSON or CSV from an open binary file object without touching disk."""
+    ext = suffix.lower()
+    if ext not in FILEOBJ_FORMATS:
         raise ValueError(f"Unsupported file format: {ext}")
 
-    _update_layer_stats(layer_id, db)
+    with transaction(db):
+        if replace_existing:
+            _clear_layer(layer_id, db)
+
+        if ext == ".csv":
+            result = _import_csv(fileobj, layer_id, db, source_srid, lat_field, lon_field)
+        else:
+            result = _import_geojson(fileobj, layer_id, db, source_srid)
     return result
 
 
 # ── GeoJSON ───────────────────────────────────────────────────────────────────
 
 def _import_geojson(
-    path: Path, layer_id: int, db: sqlite3.Connection, source_srid: int
+    fileobj: BinaryIO, layer_id: int, db: sqlite3.Connection, source_srid: int
 ) -> ImportResult:
-    with open(path, encoding="utf-8") as f:
-        data = json.load(f)
-
-    features_raw = []
-    if data.get("type") == "FeatureCollection":
-        features_raw = data.get("features", [])
-    elif data.get("type") == "Feature":
-        features_raw = [data]
-    else:
+    # Only the top-level "type" is read up front; a FeatureCollection is then
+    # streamed one feature at a time so memory stays bounded by the chunk
+    # size rather than the file size.
+    gtype = next(ijson.items(fileobj, "type"), None)
+    fileobj.seek(0)
+    if gtype == "Feature":
+        # json keeps integers beyond 64 bits exact; orjson would make them floats
+        return _insert_geojson([json.load(fileobj)], layer_id, db, source_srid)
+    if gtype != "FeatureCollection":
         raise ValueError("GeoJSON must be a FeatureCollection or Feature")
 
-    transformer = make_transformer(source_srid)
-    records, errors, sample_props = [], [], []
-
-    for i, feat in enumerate(features_raw):
-        try:
-            geom_data = feat.get("geometry")
-            if not geom_data:
-                raise ValueError("Null geometry")
-            geom = shapely.geometry.shape(geom_data)
-            if transformer:
-                geom = reproject_geom(geom, transformer)
-            props = feat.get("properties") or {}
-            rec = _make_record(layer_id, geom, props, feat.get("id"))
-            records.append(rec)
-            if len(sample_props) < 100:
-                sample_props.append(props)
-        except Exception as e:
-            errors.append(f"Feature {i}: {e}")
-
-    imported, failed, batch_errors = _batch_insert(db, records)
+    try:
+        with savepoint(db, "geojson_import"):
+            return _insert_geojson(
+                ijson.items(fileobj, "features.item", use_float=True), layer_id, db, source_srid
+            )
+    except ijson.IncompleteJSONError as exc:
+        if "integer overflow" not in str(exc):
+            raise
+    # yajl's float mode rejects integers beyond 64 bits.  Start over with
+    # ijson's pure-Python parser, which reads them exactly, only slower.
+    fileobj.seek(0)
+    return _insert_geojson(
+        ijson.get_backend("python").items(fileobj, "features.item", use_float=True),
+        layer_id,
+        db,
+        source_srid,
+    )
+
+
+def _insert_geojson(
+    features_raw: Iterable[dict[str, Any]], layer_id: int, db: sqlite3.Connection, source_srid: int
+) -> ImportResult:
+    errors: list[str] = []
+    imported, failed, batch_errors, bbox = _insert_parsed(
+        layer_id, db, _parse_geojson_features(features_raw, errors), make_transformer(source_srid), "Feature"
+    )
     errors.extend(batch_errors)
-    _update_attribute_schema(layer_id, db, sample_props)
-    bbox = _compute_bbox(records)
     return ImportResult(features_imported=imported, features_failed=failed + len(errors) - len(batch_errors), errors=errors, bbox=bbox)
 
 
+# Coordinate types taken by the Point fast path; anything else, null, strings
+# or bools included, is left to shapely.geometry.shape() to accept or reject.
+_COORD_TYPES = (int, float)
+
+
+def _parse_geojson_features(
+    features_raw: Iterable[dict[str, Any]], errors: list[str]
+) -> Iterator[_Parsed]:
+    # 2D Points, the bulk of most large exports, are built for a whole chunk
+    # by one shapely.points call; other geometries go through shape().
+    features = enumerate(features_raw)
+    while chunk := list(itertools.islice(features, _IMPORT_CHUNK_SIZE)):
+        parsed: list[list[Any]] = []  # [geometry or None, properties, fid, index]
+        point_slots: list[tuple[int, int, dict[str, Any]]] = []  # (slot, index, geometry)
+        point_coords: list[Any] = []
+        for i, feat in chunk:
+            try:
+                geom_data = feat.get("geometry")
+                if not geom_data:
+                    raise ValueError("Null geometry")
+                coords = geom_data.get("coordinates")
+                if (
+                    geom_data.get("type") == "Point"
+                    and isinstance(coords, list)
+                    and len(coords) == 2
+                    and type(coords[0]) in _COORD_TYPES
+                    and type(coords[1]) in _COORD_TYPES
+                ):
+                    geom = None
+                    point_slots.append((len(parsed), i, geom_data))
+                    point_coords.append(coords)
+                else:
+                    geom = shapely.geometry.shape(geom_data)
+                props = feat.get("properties") or {}
+            except Exception as e:
+                errors.append(f"Feature {i}: {e}")
+                continue
+            parsed.append([geom, props, feat.get("id"), i])
+
+        if point_coords:
+            try:
+                points = shapely.points(np.array(point_coords, dtype=np.float64))
+            except (TypeError, ValueError, OverflowError):
+                # Some coordinate does not fit a double: redo this chunk's
+                # points one by one so only the bad features are reported.
+                points = []
+                for _, i, geom_data in point_slots:
+                    try:
+                        points.append(shapely.geometry.shape(geom_data))
+                    except Exception as e:
+                        errors.append(f"Feature {i}: {e}")
+                        points.append(None)
+            for (slot, _, _), point in zip(point_slots, points):
+                parsed[slot][0] = point
+
+        for geom, props, fid, i in parsed:
+            if geom is not None:
+                yield geom, props, fid, i
+
+
 # ── Shapefile ZIP ─────────────────────────────────────────────────────────────
 
 def _import_shapefile_zip(
     path: Path, layer_id: int, db: sqlite3.Connection, source_srid: int
 ) -> ImportResult:
-    tmpdir = Path(tempfile.mkdtemp())
-    try:
-        with zipfile.ZipFile(path) as zf:
-            zf.extractall(tmpdir)
+    # GDAL reads the shapefile straight out of the archive through /vsizip/,
+    # so nothing is extracted to disk.
+    with zipfile.ZipFile(path) as zf:
+        shp_name = next((n for n in zf.namelist() if n.lower().endswith(".shp")), None)
+    if shp_name is None:
+        raise ValueError("No .shp file found in ZIP archive")
 
-        shp_files = list(tmpdir.rglob("*.shp"))
-        if not shp_files:
-            raise ValueError("No .shp file found in ZIP archive")
-        shp_path = shp_files[0]
-
-        return _import_via_fiona(shp_path, layer_id, db, source_srid)
-    finally:
-        shutil.rmtree(tmpdir, ignore_errors=True)
+    return _import_via_fiona(f"/vsizip/{path.resolve()}/{shp_name}", layer_id, db, source_srid)
 
 
 # ── GeoPackage ────────────────────────────────────────────────────────────────
@@ -132,7 +236,7 @@ def _import_geopackage(
 # ── Fiona-based import (Shapefile + GPKG) ─────────────────────────────────────
 
 def _import_via_fiona(
-    path: Path, layer_id: int, db: sqlite3.Connection, source_srid: int
+    path: Path | str, layer_id: int, db: sqlite3.Connection, source_srid: int
 ) -> ImportResult:
     try:
         import fiona
@@ -141,8 +245,6 @@ def _import_via_fiona(
     except ImportError:
         raise ImportError("fiona is required to import Shapefile and GeoPackage files")
 
-    records, errors, sample_props = [], [], []
-
     with fiona.open(str(path)) as src:
         # Determine source CRS
         detected_srid = source_srid
@@ -153,32 +255,35 @@ def _import_via_fiona(
             except Exception:
                 pass
 
-        transformer = make_transformer(detected_srid)
-
-        for i, feat in enumerate(src):
-            try:
-                geom_data = feat.get("geometry")
-                if not geom_data:
-                    raise ValueError("Null geometry")
-                geom = shapely.geometry.shape(geom_data)
-                if transformer:
-                    geom = reproject_geom(geom, transformer)
-                props = dict(feat.get("properties") or {})
-                # fiona already returns None for null values in 1.9+
-                rec = _make_record(layer_id, geom, props, feat.get("id"))
-                records.append(rec)
-                if len(sample_props) < 100:
-                    sample_props.append(props)
-            except Exception as e:
-                errors.append(f"Feature {i}: {e}")
+        errors: list[str] = []
+        # fiona reads and shapely parses on a background thread while this one
+        # reprojects, encodes and inserts the previous chunks.
+        with closing(_read_ahead(_parse_fiona_features(src, errors))) as parsed:
+            imported, failed, batch_errors, bbox = _insert_parsed(
+                layer_id, db, parsed, make_transformer(detected_srid), "Feature"
+            )
 
-    imported, failed, batch_errors = _batch_insert(db, records)
     errors.extend(batch_errors)
-    _update_attribute_schema(layer_id, db, sample_props)
-    bbox = _compute_bbox(records)
     return ImportResult(features_imported=imported, features_failed=failed, errors=errors, bbox=bbox)
 
 
+def _parse_fiona_features(
+    src: Iterable[Any], errors: list[str]
+) -> Iterator[_Parsed]:
+    for i, feat in enumerate(src):
+        try:
+            geom_data = feat.get("geometry")
+            if not geom_data:
+                raise ValueError("Null geometry")
+            geom = shapely.geometry.shape(geom_data)
+            # fiona already returns None for null values in 1.9+
+            props = dict(feat.get("properties") or {})
+        except Exception as e:
+            errors.append(f"Feature {i}: {e}")
+            continue
+        yield geom, props, feat.get("id"), i
+
+
 # ── CSV ───────────────────────────────────────────────────────────────────────
 
 _LAT_NAMES = {"lat", "latitude", "y", "northing", "ylat"}
@@ -186,67 +291,106 @@ _LON_NAMES = {"lon", "lng", "longitude", "x", "easting", "xlon", "xlong"}
 
 
 def _import_csv(
-    path: Path,
+    fileobj: BinaryIO,
     layer_id: int,
     db: sqlite3.Connection,
     source_srid: int,
     lat_field: str | None,
     lon_field: str | None,
 ) -> ImportResult:
-    with open(path, newline="", encoding="utf-8-sig") as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
-
-    if not rows:
-        return ImportResult(features_imported=0, features_failed=0, errors=["CSV has no data rows"], bbox=None)
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        headers = next(reader, [])
+        if not headers:
+            return ImportResult(features_imported=0, features_failed=0, errors=["CSV has no data rows"], bbox=None)
+
+        # Auto-detect lat/lon columns
+        if not lat_field:
+            for h in headers:
+                if h.lower() in _LAT_NAMES:
+                    lat_field = h
+                    break
+        if not lon_field:
+            for h in headers:
+                if h.lower() in _LON_NAMES:
+                    lon_field = h
+                    break
+
+        if lat_field not in headers or lon_field not in headers:
+            raise ValueError(
+                f"Cannot detect lat/lon columns. Found: {headers}. "
+                "Specify lat_field and lon_field explicitly."
+            )
 
-    headers = list(rows[0].keys())
-
-    # Auto-detect lat/lon columns
-    if not lat_field:
-        for h in headers:
-            if h.lower() in _LAT_NAMES:
-                lat_field = h
-                break
-    if not lon_field:
-        for h in headers:
-            if h.lower() in _LON_NAMES:
-                lon_field = h
-                break
-
-    if not lat_field or not lon_field:
-        raise ValueError(
-            f"Cannot detect lat/lon columns. Found: {headers}. "
-            "Specify lat_field and lon_field explicitly."
+        # Blank lines are skipped, as DictReader does; the rest are counted
+        # so a header followed only by blank lines still reports no data.
+        data_rows = 0
+
+        def non_blank_rows() -> Iterator[list[str]]:
+            nonlocal data_rows
+            for row in reader:
+                if row:
+                    data_rows += 1
+                    yield row
+
+        errors: list[str] = []
+        imported, failed, batch_errors, bbox = _insert_parsed(
+            layer_id,
+            db,
+            _parse_csv_rows(non_blank_rows(), headers, lat_field, lon_field, errors),
+            make_transformer(source_srid),
+            "Row",
         )
+    finally:
+        text.detach()
 
-    transformer = make_transformer(source_srid)
-    records, errors, sample_props = [], [], []
-
-    for i, row in enumerate(rows):
-        try:
-            lat = float(row[lat_field])
-            lon = float(row[lon_field])
-            geom = shapely.geometry.Point(lon, lat)
-            if transformer:
-                geom = reproject_geom(geom, transformer)
-            props = {k: v for k, v in row.items() if k not in (lat_field, lon_field)}
-            # Attempt numeric coercion
-            props = _coerce_types(props)
-            rec = _make_record(layer_id, geom, props)
-            records.append(rec)
-            if len(sample_props) < 100:
-                sample_props.append(props)
-        except Exception as e:
-            errors.append(f"Row {i + 1}: {e}")
+    if not data_rows:
+        return ImportResult(features_imported=0, features_failed=0, errors=["CSV has no data rows"], bbox=None)
 
-    imported, failed, batch_errors = _batch_insert(db, records)
     errors.extend(batch_errors)
-    _update_attribute_schema(layer_id, db, sample_props)
-    bbox = _compute_bbox(records)
     return ImportResult(features_imported=imported, features_failed=failed, errors=errors, bbox=bbox)
 
 
+def _parse_csv_rows(
+    rows: Iterator[list[str]],
+    headers: list[str],
+    lat_field: str,
+    lon_field: str,
+    errors: list[str],
+) -> Iterator[_Parsed]:
+    # Rows are validated one by one, but the points for a whole chunk are
+    # built by a single shapely.points call instead of one Point per row.
+    # Rows are numbered from 1, blank lines excluded.  Cells are read by
+    # position: a short row reads its missing cells as empty, and cells
+    # beyond the header are dropped.
+    lat_idx = headers.index(lat_field)
+    lon_idx = headers.index(lon_field)
+    prop_columns = [(i, h) for i, h in enumerate(headers) if i not in (lat_idx, lon_idx)]
+    width = len(headers)
+    numbered = enumerate(rows, 1)
+    while chunk := list(itertools.islice(numbered, _IMPORT_CHUNK_SIZE)):
+        lons, lats, props_list, rows_ok = [], [], [], []
+        for i, row in chunk:
+            if len(row) < width:
+                row += [""] * (width - len(row))
+            try:
+                lat = float(row[lat_idx])
+                lon = float(row[lon_idx])
+                # Attempt numeric coercion
+                props = _coerce_types({h: row[j] for j, h in prop_columns})
+            except Exception as e:
+                errors.append(f"Row {i}: {e}")
+                continue
+            lons.append(lon)
+            lats.append(lat)
+            props_list.append(props)
+            rows_ok.append(i)
+        if props_list:
+            points = shapely.points(np.array(lons), np.array(lats))
+            yield from zip(points, props_list, itertools.repeat(None), rows_ok)
+
+
 def _coerce_types(props: dict[str, str]) -> dict[str, Any]:
     result = {}
     for k, v in props.items():
@@ -269,84 +413,310 @@ def _coerce_types(props: dict[str, str]) -> dict[str, Any]:
 
 # ── Shared helpers ────────────────────────────────────────────────────────────
 
+# Features are parsed, reprojected and inserted this many at a time, so a
+# streamed source never needs more than one chunk in memory.
+_IMPORT_CHUNK_SIZE = 5000
+
+# (geometry, properties, fid, index) as yielded by the parsers; the index
+# numbers the feature or row in the source for error messages.
+_Parsed = tuple[BaseGeometry, dict[str, Any], Any, int]
+
+
+def _insert_parsed(
+    layer_id: int,
+    db: sqlite3.Connection,
+    parsed: Iterable[_Parsed],
+    transformer: Transformer | None,
+    label: str,
+) -> tuple[int, int, list[str], list[float] | None]:
+    """Insert a stream of parsed features chunk by chunk.
+
+    Returns (imported, failed, batch_errors, bbox) and updates the layer's
+    stats and its attribute schema (from the first 100 features).  A feature
+    that cannot be reprojected or encoded is reported as "<label> <index>"
+    and counted as failed without affecting the rest of its chunk.
+    """
+    imported, failed, errors = 0, 0, []
+    bbox: list[float] | None = None
+    geom_type = ""
+    # True while every built row was stored, so the running count and bbox
+    # describe exactly the rows added and the layer stats can be bumped
+    # without rescanning its features.
+    exact = True
+    sample_props: list[dict[str, Any]] = []
+    it = iter(parsed)
+    while chunk := list(itertools.islice(it, _IMPORT_CHUNK_SIZE)):
+        if len(sample_props) < 100:
+            sample_props.extend(item[1] for item in chunk[: 100 - len(sample_props)])
+        if not geom_type:
+            geom_type = chunk[0][0].geom_type
+        try:
+            records, chunk_bbox = _build_records(layer_id, chunk, transformer)
+        except Exception:
+            # Redo the chunk one feature at a time so only the bad ones are lost.
+            records, chunk_bbox = [], None
+            for item in chunk:
+                try:
+                    record, item_bbox = _build_records(layer_id, [item], transformer)
+                except Exception as e:
+                    errors.append(f"{label} {item[3]}: {e}")
+                    failed += 1
+                    continue
+                records.extend(record)
+                chunk_bbox = _merge_bbox(chunk_bbox, item_bbox)
+        ok, bad, batch_errors = _batch_insert(db, records)
+        exact = exact and ok == len(records)
+        imported += ok
+        failed += bad
+        errors.extend(batch_errors)
+        bbox = _merge_bbox(bbox, chunk_bbox)
+    if exact:
+        _add_layer_stats(layer_id, db, imported, bbox, geom_type)
+    else:
+        _update_layer_stats(layer_id, db)
+    _update_attribute_schema(layer_id, db, sample_props)
+    return imported, failed, errors, bbox
+
+
+T = TypeVar("T")
+
+_READ_AHEAD_DONE = object()
+
+
+def _read_ahead(items: Iterable[T], chunk_size: int = _IMPORT_CHUNK_SIZE, depth: int = 4) -> Iterator[T]:
+    """Iterate ``items`` on a background thread, up to ``depth`` chunks ahead.
+
+    Exceptions raised by the producer are re-raised in the consumer.  Close
+    the returned generator to stop and join the thread early.
+    """
+    chunks: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item: Any) -> None:
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def produce() -> None:
+        try:
+            it = iter(items)
+            while not stop.is_set() and (chunk := list(itertools.islice(it, chunk_size))):
+                put(chunk)
+            put(_READ_AHEAD_DONE)
+        except BaseException as exc:
+            put(exc)
+
+    thread = threading.Thread(target=produce, name="import-read-ahead", daemon=True)
+    thread.start()
+    try:
+        while (chunk := chunks.get()) is not _READ_AHEAD_DONE:
+            if isinstance(chunk, BaseException):
+                raise chunk
+            yield from chunk
+    finally:
+        stop.set()
+        thread.join()
+
+
+# (layer_id, fid, geometry, properties, bbox_minx, bbox_miny, bbox_maxx, bbox_maxy),
+# in the column order of _INSERT_COLUMNS.
+_Record = tuple[int, str, bytes, str, float, float, float, float]
+
+
+def _build_records(
+    layer_id: int,
+    parsed: list[_Parsed],
+    transformer: Transformer | None,
+) -> tuple[list[_Record], list[float] | None]:
+    """Turn parsed features into feature rows.
+
+    Geometries are reprojected, WKB-encoded and measured as whole batches, so
+    PROJ and GEOS are each entered once per import rather than per feature.
+    Also returns the bbox of the whole batch, reduced from the same bounds.
+    """
+    geoms = [item[0] for item in parsed]
+    if not geoms:
+        return [], None
+    if transformer:
+        geoms = reproject_many(geoms, transformer)
+    bboxes = bboxes_from_geoms(geoms)
+    records = [
+        _make_record(layer_id, wkb, bbox, props, fid)
+        for wkb, bbox, (_, props, fid, _) in zip(geoms_to_wkbs(geoms), bboxes.tolist(), parsed)
+    ]
+    return records, union_bbox(bboxes)
+
+
 def _make_record(
     layer_id: int,
-    geom: BaseGeometry,
+    wkb: bytes,
+    bbox: list[float],
     props: dict[str, Any],
     fid: Any = None,
-) -> dict[str, Any]:
-    wkb = geom_to_wkb(geom)
-    minx, miny, maxx, maxy = bbox_from_geom(geom)
-    return {
-        "layer_id": layer_id,
-        "fid": str(fid) if fid is not None else str(uuid.uuid4()),
-        "geometry": wkb,
-        "properties": json.dumps(props, default=str),
-        "bbox_minx": minx,
-        "bbox_miny": miny,
-        "bbox_maxx": maxx,
-        "bbox_maxy": maxy,
-    }
+) -> _Record:
+    minx, miny, maxx, maxy = bbox
+    return (
+        layer_id,
+        str(fid) if fid is not None else str(uuid.uuid4()),
+        wkb,
+        _dump_properties(props),
+        minx,
+        miny,
+        maxx,
+        maxy,
+    )
+
+
+def _dump_properties(props: dict[str, Any]) -> str:
+    try:
+        return orjson.dumps(props, default=str, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    except TypeError:
+        # orjson refuses integers beyond 64 bits without consulting default=;
+        # the json module writes them exactly, as the importer always has.
+        # Non-finite floats become null, as orjson writes them, so the stored
+        # text stays valid JSON.
+        return json.dumps(_finite_floats(props), default=str, allow_nan=False)
+
+
+def _finite_floats(value: Any) -> Any:
+    """Copy of ``value`` with NaN and infinite floats, at any depth, replaced by None."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _finite_floats(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite_floats(v) for v in value]
+    return value
+
+
+_INSERT_COLUMNS = "(layer_id, fid, geometry, properties, bbox_minx, bbox_miny, bbox_maxx, bbox_maxy)"
+_INSERT_ROW = "(?, ?, ?, ?, ?, ?, ?, ?)"
+
+# Rows packed into one multi-row INSERT: each statement step then inserts
+# this many features.  64 * 8 parameters stays under the 999-variable limit
+# of older SQLite builds.
+_ROWS_PER_INSERT = 64
+
+_SQL_INSERT_ONE = f"INSERT OR IGNORE INTO features {_INSERT_COLUMNS} VALUES {_INSERT_ROW}"
+_SQL_INSERT_MANY = (
+    f"INSERT OR IGNORE INTO features {_INSERT_COLUMNS} VALUES "
+    + ", ".join([_INSERT_ROW] * _ROWS_PER_INSERT)
+)
 
 
 def _batch_insert(
     db: sqlite3.Connection,
-    records: list[dict[str, Any]],
-    chunk_size: int = 500,
+    records: list[_Record],
+    chunk_size: int = 5000,
 ) -> tuple[int, int, list[str]]:
-    imported, failed, errors = 0, 0, []
-    sql = """
-        INSERT OR IGNORE INTO features
-            (layer_id, fid, geometry, properties, bbox_minx, bbox_miny, bbox_maxx, bbox_maxy)
-        VALUES
-            (:layer_id, :fid, :geometry, :properties, :bbox_minx, :bbox_miny, :bbox_maxx, :bbox_maxy)
+    """Insert records inside the caller's transaction.
+
+    Each chunk gets its own savepoint, so a failing chunk is rolled back and
+    reported without losing the chunks before it.  The imported count is the
+    number of rows actually stored; duplicate fids skipped by INSERT OR
+    IGNORE are neither imported nor failed.
     """
+    imported, failed, errors = 0, 0, []
     for i in range(0, len(records), chunk_size):
         chunk = records[i : i + chunk_size]
+        full = len(chunk) - len(chunk) % _ROWS_PER_INSERT
         try:
-            with db:
-                db.executemany(sql, chunk)
-            imported += len(chunk)
+            with savepoint(db, "import_chunk"):
+                stored = db.executemany(
+                    _SQL_INSERT_MANY,
+                    (
+                        tuple(itertools.chain.from_iterable(chunk[j : j + _ROWS_PER_INSERT]))
+                        for j in range(0, full, _ROWS_PER_INSERT)
+                    ),
+                ).rowcount
+                stored += db.executemany(_SQL_INSERT_ONE, chunk[full:]).rowcount
+            imported += stored
         except Exception as e:
             errors.append(f"Batch insert error (chunk {i // chunk_size}): {e}")
             failed += len(chunk)
     return imported, failed, errors
 
 
+_SQL_CLEAR_LAYER = "DELETE FROM features WHERE layer_id = ?"
+_SQL_RESET_LAYER_STATS = """
+    UPDATE layers SET
+        feature_count = 0,
+        bbox_minx = NULL, bbox_miny = NULL, bbox_maxx = NULL, bbox_maxy = NULL
+    WHERE id = ?
+"""
+
+# MIN()/MAX() with a NULL argument return NULL, so COALESCE falls back to
+# whichever side is set: the stored bbox or the bbox of the new rows.
+_SQL_ADD_LAYER_STATS = """
+    UPDATE layers SET
+        feature_count = feature_count + :count,
+        bbox_minx = COALESCE(MIN(bbox_minx, :minx), bbox_minx, :minx),
+        bbox_miny = COALESCE(MIN(bbox_miny, :miny), bbox_miny, :miny),
+        bbox_maxx = COALESCE(MAX(bbox_maxx, :maxx), bbox_maxx, :maxx),
+        bbox_maxy = COALESCE(MAX(bbox_maxy, :maxy), bbox_maxy, :maxy),
+        geometry_type = CASE WHEN geometry_type = '' THEN :geom_type ELSE geometry_type END,
+        updated_at = datetime('now')
+    WHERE id = :layer_id
+"""
+
+
+def _clear_layer(layer_id: int, db: sqlite3.Connection) -> None:
+    """Delete every feature of a layer and zero its stats."""
+    db.execute(_SQL_CLEAR_LAYER, (layer_id,))
+    db.execute(_SQL_RESET_LAYER_STATS, (layer_id,))
+
+
+def _add_layer_stats(
+    layer_id: int,
+    db: sqlite3.Connection,
+    count: int,
+    bbox: list[float] | None,
+    geom_type: str,
+) -> None:
+    """Fold newly inserted rows into the layer's stored count and bbox."""
+    minx, miny, maxx, maxy = bbox or (None, None, None, None)
+    db.execute(
+        _SQL_ADD_LAYER_STATS,
+        {
+            "count": count,
+            "minx": minx, "miny": miny, "maxx": maxx, "maxy": maxy,
+            "geom_type": geom_type,
+            "layer_id": layer_id,
+        },
+    )
+
+
 def _update_layer_stats(layer_id: int, db: sqlite3.Connection) -> None:
+    """Recompute the layer's stats from its features (full scan)."""
+    # Only the 5-byte WKB header of one row is fetched: enough for the type.
     row = db.execute(
         """SELECT COUNT(*) as cnt,
                   MIN(bbox_minx) as minx, MIN(bbox_miny) as miny,
                   MAX(bbox_maxx) as maxx, MAX(bbox_maxy) as maxy,
-                  geometry
+                  substr(geometry, 1, 5) as wkb_header
            FROM features WHERE layer_id = ? AND geometry IS NOT NULL""",
         (layer_id,),
     ).fetchone()
 
-    geom_type = ""
-    if row and row["geometry"]:
-        try:
-            import shapely.wkb
-            g = shapely.wkb.loads(bytes(row["geometry"]))
-            geom_type = g.geom_type
-        except Exception:
-            pass
+    geom_type = wkb_geom_type(row["wkb_header"]) if row and row["wkb_header"] else ""
 
-    with db:
-        db.execute(
-            """UPDATE layers SET
-                feature_count = ?,
-                bbox_minx = ?, bbox_miny = ?, bbox_maxx = ?, bbox_maxy = ?,
-                geometry_type = CASE WHEN geometry_type = '' THEN ? ELSE geometry_type END,
-                updated_at = datetime('now')
-               WHERE id = ?""",
-            (
-                row["cnt"] if row else 0,
-                row["minx"], row["miny"], row["maxx"], row["maxy"],
-                geom_type,
-                layer_id,
-            ),
-        )
+    db.execute(
+        """UPDATE layers SET
+            feature_count = ?,
+            bbox_minx = ?, bbox_miny = ?, bbox_maxx = ?, bbox_maxy = ?,
+            geometry_type = CASE WHEN geometry_type = '' THEN ? ELSE geometry_type END,
+            updated_at = datetime('now')
+           WHERE id = ?""",
+        (
+            row["cnt"] if row else 0,
+            row["minx"], row["miny"], row["maxx"], row["maxy"],
+            geom_type,
+            layer_id,
+        ),
+    )
 
 
 def _update_attribute_schema(
@@ -354,19 +724,13 @@ def _update_attribute_schema(
 ) -> None:
     schema = infer_schema(sample_props)
     if schema:
-        with db:
-            db.execute(
-                "UPDATE layers SET attribute_schema = ? WHERE id = ?",
-                (json.dumps(schema), layer_id),
-            )
+        db.execute(
+            "UPDATE layers SET attribute_schema = ? WHERE id = ?",
+            (orjson.dumps(schema).decode(), layer_id),
+        )
 
 
-def _compute_bbox(records: list[dict]) -> list[float] | None:
-    vals = [(r["bbox_minx"], r["bbox_miny"], r["bbox_maxx"], r["bbox_maxy"]) for r in records if r.get("bbox_minx") is not None]
-    if not vals:
-        return None
-    minx = min(v[0] for v in vals)
-    miny = min(v[1] for v in vals)
-    maxx = max(v[2] for v in vals)
-    maxy = max(v[3] for v in vals)
-    return [minx, miny, maxx, maxy]
+def _merge_bbox(a: list[float] | None, b: list[float] | None) -> list[float] | None:
+    if a is None or b is None:
+        return a or b
+    return [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
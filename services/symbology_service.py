@@ -5,8 +5,11 @@ so server-side and client-side rendering agree.
 """
 from __future__ import annotations
 
+import functools
 import json
-from typing import Any
+import operator
+from dataclasses import dataclass
+from typing import Any, Callable
 
 from models.db_models import SymbologyRule
 
@@ -20,6 +23,39 @@ DEFAULT_STYLE = {
 }
 
 
+Predicate = Callable[[dict[str, Any]], bool]
+
+
+@dataclass(slots=True, frozen=True)
+class CompiledRules:
+    """A layer's rules sorted by rule_order, each paired with its predicate."""
+    matchers: tuple[tuple[Predicate, SymbologyRule], ...]
+    default_rule: SymbologyRule | None
+
+
+def compile_rules(rules: list[SymbologyRule]) -> CompiledRules:
+    """Sort the rules once and turn each filter into a predicate.
+
+    Compile once per rule set and call evaluate_compiled() per feature; the
+    rule-side values are parsed here rather than on every feature.
+    """
+    sorted_rules = sorted(rules, key=lambda r: r.rule_order)
+    default_rule = next((r for r in sorted_rules if r.is_default), None)
+    matchers = tuple((_compile(rule), rule) for rule in sorted_rules if not rule.is_default)
+    return CompiledRules(matchers, default_rule)
+
+
+def evaluate_compiled(
+    compiled: CompiledRules,
+    properties: dict[str, Any],
+) -> SymbologyRule | None:
+    """Return the first matching rule, or the default rule (None if no rules)."""
+    for predicate, rule in compiled.matchers:
+        if predicate(properties):
+            return rule
+    return compiled.default_rule
+
+
 def evaluate_rules(
     rules: list[SymbologyRule],
     properties: dict[str, Any],
@@ -27,56 +63,102 @@ def evaluate_rules(
     """
     Return the first matching rule in rule_order, or the default rule.
     Returns None if no rules exist.
+
+    The compiled form of each distinct rule set is cached, so calling this
+    once per feature does not re-sort and re-compile the rules every time.
     """
-    if not rules:
-        return None
-    sorted_rules = sorted(rules, key=lambda r: r.rule_order)
-    default_rule = next((r for r in sorted_rules if r.is_default), None)
-    for rule in sorted_rules:
-        if rule.is_default:
-            continue
-        if _matches(rule, properties):
-            return rule
-    return default_rule
+    return evaluate_compiled(_cached_compile(tuple(rules)), properties)
+
+
+# Keyed by the rules themselves (frozen, hashable): any edit to a rule makes
+# a new key, so there is no version to track and stale sets simply age out.
+@functools.lru_cache(maxsize=256)
+def _cached_compile(rules: tuple[SymbologyRule, ...]) -> CompiledRules:
+    return compile_rules(list(rules))
+
+
+def _always(props: dict[str, Any]) -> bool:
+    return True
 
 
-def _matches(rule: SymbologyRule, props: dict[str, Any]) -> bool:
-    if not rule.filter_field:
-        return True
-    val = props.get(rule.filter_field)
+def _never(props: dict[str, Any]) -> bool:
+    return False
+
+
+_NUMERIC_OPS: dict[str, Callable[[float, float], bool]] = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+
+def _compile(rule: SymbologyRule) -> Predicate:
+    field = rule.filter_field
+    if not field:
+        return _always
     rv = rule.filter_value
     op = rule.filter_operator
 
     if op == "is_null":
-        return val is None or val == ""
-    if val is None:
-        return False
-
-    if op == "eq":
-        return str(val) == str(rv)
-    elif op == "neq":
-        return str(val) != str(rv)
-    elif op == "contains":
-        return str(rv) in str(val)
-    elif op == "in":
+        def predicate(props):
+            val = props.get(field)
+            return val is None or val == ""
+        return predicate
+
+    # Property values are mostly str already (CSV, WFS-T) or float (numeric
+    # fields), so the predicates test the exact type before converting.
+    if op in ("eq", "neq", "contains"):
+        rv_str = str(rv)
+        if op == "eq":
+            def predicate(props):
+                val = props.get(field)
+                if val.__class__ is str:
+                    return val == rv_str
+                return val is not None and str(val) == rv_str
+        elif op == "neq":
+            def predicate(props):
+                val = props.get(field)
+                if val.__class__ is str:
+                    return val != rv_str
+                return val is not None and str(val) != rv_str
+        else:
+            def predicate(props):
+                val = props.get(field)
+                if val.__class__ is str:
+                    return rv_str in val
+                return val is not None and rv_str in str(val)
+        return predicate
+
+    if op == "in":
         try:
-            allowed = json.loads(rv or "[]")
-            return str(val) in [str(a) for a in allowed]
+            allowed = frozenset(str(a) for a in json.loads(rv or "[]"))
         except (json.JSONDecodeError, TypeError):
+            return _never
+
+        def predicate(props):
+            val = props.get(field)
+            if val.__class__ is str:
+                return val in allowed
+            return val is not None and str(val) in allowed
+        return predicate
+
+    compare = _NUMERIC_OPS.get(op)
+    if compare is None:
+        return _never
+    try:
+        num_rv = float(rv)
+    except (TypeError, ValueError):
+        return _never
+
+    def predicate(props):
+        val = props.get(field)
+        if val.__class__ is float:
+            return compare(val, num_rv)
+        if val is None:
             return False
-    else:
-        # Numeric comparisons
         try:
-            num_val = float(val)
-            num_rv = float(rv)
+            return compare(float(val), num_rv)
         except (TypeError, ValueError):
             return False
-        if op == "gt":
-            return num_val > num_rv
-        elif op == "gte":
-            return num_val >= num_rv
-        elif op == "lt":
-            return num_val < num_rv
-        elif op == "lte":
-            return num_val <= num_rv
-    return False
+    return predicate
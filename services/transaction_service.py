@@ -3,12 +3,19 @@ WFS-T Transaction handler: Insert, Update, Delete operations.
 """
 from __future__ import annotations
 
+import functools
+import itertools
 import json
 import sqlite3
 import uuid
-import xml.etree.ElementTree as ET
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from typing import BinaryIO
 
+import orjson
+from lxml import etree as ET
+
+from database import transaction
 from models.db_models import Layer
 from services.geometry_service import (
     bbox_from_geom,
@@ -21,52 +28,123 @@ from services.geometry_service import (
 
 _WFS = "http://www.opengis.net/wfs/2.0"
 _GML = "http://www.opengis.net/gml/3.2"
+_GML_311 = "http://www.opengis.net/gml"
 _FES = "http://www.opengis.net/fes/2.0"
 
+# Inserted features are buffered and written this many rows per INSERT
+# statement (8 parameters each, under SQLite's 999-variable limit).
+_ROWS_PER_INSERT = 64
 
-def execute_transaction(xml_body: bytes, db: sqlite3.Connection) -> str:
-    """Parse and execute a WFS Transaction request. Returns response XML."""
-    try:
-        root = ET.fromstring(xml_body)
-    except ET.ParseError as exc:
-        return _exception_report("InvalidParameterValue", f"Malformed XML: {exc}")
-
-    # Verify root element
-    local = root.tag.split("}")[-1] if "}" in root.tag else root.tag
-    if local != "Transaction":
-        return _exception_report("OperationNotSupported", f"Expected wfs:Transaction, got {local}")
+_INSERT_ROW = "(?, ?, ?, ?, ?, ?, ?, ?)"
+_SQL_INSERT_FEATURES = (
+    "INSERT INTO features (layer_id, fid, geometry, properties, "
+    "bbox_minx, bbox_miny, bbox_maxx, bbox_maxy) VALUES "
+)
+_SQL_INSERT_ONE = _SQL_INSERT_FEATURES + _INSERT_ROW
+_SQL_INSERT_MANY = _SQL_INSERT_FEATURES + ", ".join([_INSERT_ROW] * _ROWS_PER_INSERT)
+
+# Resource ids bound per UPDATE ... WHERE fid IN (...) statement
+_FIDS_PER_STATEMENT = 500
+
+
+def execute_transaction(source: BinaryIO, db: sqlite3.Connection) -> str:
+    """Parse and execute a WFS Transaction request read from a binary stream.
+
+    The body is parsed incrementally: each Insert feature, Update and Delete is
+    executed as soon as its end tag arrives and is then dropped from the tree,
+    so memory stays bounded by the largest single feature, not the request.
+    """
+    # Request bodies are untrusted: never expand entities or fetch external DTDs.
+    # huge_tree lifts libxml2's 10 MB text-node limit, which a single dense
+    # posList can exceed; memory is still bounded by clearing each subtree.
+    events = ET.iterparse(
+        source,
+        events=("start", "end"),
+        resolve_entities=False,
+        no_network=True,
+        huge_tree=True,
+    )
 
     inserted: list[tuple[str, str]] = []  # (layer_name, fid)
+    pending: list[tuple] = []  # feature rows not yet written
+    layers: dict[str, Layer] = {}  # layer lookups for this transaction
     total_updated = 0
     total_deleted = 0
-    affected_layers: set[int] = set()
+    # Layers with only Inserts get their stats bumped from the inserted rows;
+    # Updates and Deletes can shrink a bbox, so those layers are rescanned.
+    inserted_stats: dict[int, _InsertStats] = {}
+    rescan_layers: set[int] = set()
 
     try:
-        with db:
-            for child in root:
-                tag = child.tag.split("}")[-1] if "}" in child.tag else child.tag
-
-                if tag == "Insert":
-                    results, layer_ids = _handle_insert(child, db)
-                    inserted.extend(results)
-                    affected_layers.update(layer_ids)
-
-                elif tag == "Update":
-                    count, layer_id = _handle_update(child, db)
-                    total_updated += count
-                    if layer_id:
-                        affected_layers.add(layer_id)
-
-                elif tag == "Delete":
-                    count, layer_id = _handle_delete(child, db)
-                    total_deleted += count
-                    if layer_id:
-                        affected_layers.add(layer_id)
+        with transaction(db):
+            depth = 0
+            for event, elem in events:
+                if event == "start":
+                    depth += 1
+                    if depth == 1:
+                        # Verify root element.  Like every element below, it is
+                        # matched by local name, so WFS 1.1 and un-namespaced
+                        # requests are accepted too.
+                        if _local_name(elem.tag) != "Transaction":
+                            raise _WfsError(
+                                "OperationNotSupported",
+                                f"Expected wfs:Transaction, got {_local_name(elem.tag)}",
+                            )
+                    continue
+
+                depth -= 1
+                parent = elem.getparent()
+                if depth == 2:
+                    if _local_name(parent.tag) != "Insert":
+                        continue
+                    layer_name, row = _handle_insert_feature(elem, db, layers)
+                    inserted.append((layer_name, row[1]))
+                    stats = inserted_stats.get(row[0])
+                    if stats is None:
+                        stats = inserted_stats[row[0]] = _InsertStats()
+                    stats.add(row[4:])
+                    pending.append(row)
+                    if len(pending) == _ROWS_PER_INSERT:
+                        db.execute(_SQL_INSERT_MANY, tuple(itertools.chain.from_iterable(pending)))
+                        pending.clear()
+
+                elif depth == 1:
+                    op = _local_name(elem.tag)
+                    # Updates and Deletes must see every earlier Insert
+                    if pending and (op == "Update" or op == "Delete"):
+                        db.executemany(_SQL_INSERT_ONE, pending)
+                        pending.clear()
+
+                    if op == "Update":
+                        count, layer_id = _handle_update(elem, db, layers)
+                        total_updated += count
+                        if layer_id:
+                            rescan_layers.add(layer_id)
+
+                    elif op == "Delete":
+                        count, layer_id = _handle_delete(elem, db, layers)
+                        total_deleted += count
+                        if layer_id:
+                            rescan_layers.add(layer_id)
+                else:
+                    continue
+
+                # Done with this subtree: free it and anything before it
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del parent[0]
+
+            db.executemany(_SQL_INSERT_ONE, pending)
 
             # Update stats for all affected layers
-            for layer_id in affected_layers:
+            for layer_id in rescan_layers:
                 _update_layer_stats(db, layer_id)
+            for layer_id, stats in inserted_stats.items():
+                if layer_id not in rescan_layers:
+                    _add_layer_stats(db, layer_id, stats)
 
+    except ET.ParseError as exc:
+        return _exception_report("InvalidParameterValue", f"Malformed XML: {exc}")
     except _WfsError as exc:
         return _exception_report(exc.code, exc.message)
     except Exception as exc:
@@ -77,160 +155,166 @@ def execute_transaction(xml_body: bytes, db: sqlite3.Connection) -> str:
 
 # ── Insert ───────────────────────────────────────────────────────────────────
 
-def _handle_insert(
-    elem: ET.Element, db: sqlite3.Connection
-) -> tuple[list[tuple[str, str]], set[int]]:
-    """Process a wfs:Insert element. Returns ([(layer_name, fid), ...], {layer_ids})."""
-    inserted = []
-    layer_ids = set()
-
-    for feature_elem in elem:
-        # Tag is the layer name (possibly namespaced)
-        layer_name = feature_elem.tag.split("}")[-1] if "}" in feature_elem.tag else feature_elem.tag
-        layer = _get_layer(db, layer_name)
-        layer_ids.add(layer.id)
-
-        # Extract gml:id or generate one
-        fid = feature_elem.get(f"{{{_GML}}}id") or feature_elem.get("gml:id") or str(uuid.uuid4())
-        # Strip "LayerName." prefix if present
-        if fid.startswith(f"{layer_name}."):
-            fid = fid[len(layer_name) + 1:]
-
-        geometry_wkb = None
-        bbox = None
-        properties: dict = {}
-
-        for child in feature_elem:
-            child_tag = child.tag.split("}")[-1] if "}" in child.tag else child.tag
-
-            if child_tag == "geometry" or child_tag == "the_geom":
-                # Geometry wrapper — find the actual GML element inside
-                gml_elem = _find_gml_geometry(child)
-                if gml_elem is not None:
-                    geom, srid = gml32_to_geom(gml_elem)
-                    # Reproject to storage CRS (4326) if needed
-                    transformer = make_transformer(srid, 4326)
-                    if transformer:
-                        geom = reproject_geom(geom, transformer)
-                    geometry_wkb = geom_to_wkb(geom)
-                    bbox = bbox_from_geom(geom)
-            elif _is_gml_geometry(child):
-                # Direct GML geometry element (not wrapped in <geometry>)
-                geom, srid = gml32_to_geom(child)
-                transformer = make_transformer(srid, 4326)
-                if transformer:
-                    geom = reproject_geom(geom, transformer)
-                geometry_wkb = geom_to_wkb(geom)
-                bbox = bbox_from_geom(geom)
-            else:
-                # Property element
-                properties[child_tag] = child.text or ""
-
-        db.execute(
-            "INSERT INTO features (layer_id, fid, geometry, properties, bbox_minx, bbox_miny, bbox_maxx, bbox_maxy) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (
-                layer.id,
-                fid,
-                geometry_wkb,
-                json.dumps(properties),
-                bbox[0] if bbox else None,
-                bbox[1] if bbox else None,
-                bbox[2] if bbox else None,
-                bbox[3] if bbox else None,
-            ),
-        )
-        inserted.append((layer_name, fid))
-
-    return inserted, layer_ids
+def _handle_insert_feature(
+    feature_elem: ET.Element, db: sqlite3.Connection, layers: dict[str, Layer]
+) -> tuple[str, tuple]:
+    """Build the features row for one wfs:Insert feature. Returns (layer_name, row).
+
+    The row is in _SQL_INSERT_FEATURES column order; the caller writes it.
+    """
+    # Tag is the layer name (possibly namespaced)
+    layer_name = _local_name(feature_elem.tag)
+    layer = _get_layer(db, layer_name, layers)
+
+    # Extract gml:id or generate one
+    fid = (
+        feature_elem.get(f"{{{_GML}}}id")
+        or feature_elem.get(f"{{{_GML_311}}}id")
+        or feature_elem.get("gml:id")
+        or str(uuid.uuid4())
+    )
+    # Strip "LayerName." prefix if present
+    if fid.startswith(f"{layer_name}."):
+        fid = fid[len(layer_name) + 1:]
+
+    geometry_wkb = None
+    bbox = None
+    properties: dict = {}
+
+    for child in feature_elem.iterchildren(ET.Element):
+        kind, child_tag = _classify_child(child.tag)
+
+        if kind == _CHILD_PROPERTY:
+            properties[child_tag] = child.text or ""
+        elif kind == _CHILD_GEOMETRY_WRAPPER:
+            # Geometry wrapper — find the actual GML element inside
+            gml_elem = _find_gml_geometry(child)
+            if gml_elem is not None:
+                geometry_wkb, bbox = _stored_geometry(gml_elem)
+        else:
+            # Direct GML geometry element (not wrapped in <geometry>)
+            geometry_wkb, bbox = _stored_geometry(child)
+
+    return layer_name, (
+        layer.id,
+        fid,
+        geometry_wkb,
+        orjson.dumps(properties).decode(),
+        bbox[0] if bbox else None,
+        bbox[1] if bbox else None,
+        bbox[2] if bbox else None,
+        bbox[3] if bbox else None,
+    )
 
 
 # ── Update ───────────────────────────────────────────────────────────────────
 
 def _handle_update(
-    elem: ET.Element, db: sqlite3.Connection
+    elem: ET.Element, db: sqlite3.Connection, layers: dict[str, Layer]
 ) -> tuple[int, int | None]:
     """Process a wfs:Update element. Returns (updated_count, layer_id)."""
     type_name = elem.get("typeName") or elem.get("typeNames") or ""
-    layer = _get_layer(db, type_name)
+    layer = _get_layer(db, type_name, layers)
 
     # Parse properties to update
     prop_updates: dict[str, str | None] = {}
     geom_update = None  # (wkb_bytes, bbox_tuple)
 
-    for prop_elem in elem.findall(f"{{{_WFS}}}Property"):
-        ref_elem = prop_elem.find(f"{{{_WFS}}}ValueReference")
-        val_elem = prop_elem.find(f"{{{_WFS}}}Value")
+    for prop_elem in elem.iterchildren(ET.Element):
+        if _local_name(prop_elem.tag) != "Property":
+            continue
+        # WFS 2.0 names the property in ValueReference, WFS 1.1 in Name
+        ref_elem = val_elem = None
+        for child in prop_elem.iterchildren(ET.Element):
+            local = _local_name(child.tag)
+            if local == "ValueReference" or local == "Name":
+                ref_elem = child
+            elif local == "Value":
+                val_elem = child
 
         if ref_elem is None or ref_elem.text is None:
             continue
         field_name = ref_elem.text.strip()
 
-        if field_name in ("geometry", "the_geom"):
+        if field_name in _GEOMETRY_PROPERTIES:
             if val_elem is not None:
                 gml_elem = _find_gml_geometry(val_elem)
                 if gml_elem is not None:
-                    geom, srid = gml32_to_geom(gml_elem)
-                    transformer = make_transformer(srid, 4326)
-                    if transformer:
-                        geom = reproject_geom(geom, transformer)
-                    geom_update = (geom_to_wkb(geom), bbox_from_geom(geom))
+                    geom_update = _stored_geometry(gml_elem)
         else:
             prop_updates[field_name] = val_elem.text if val_elem is not None else None
 
     # Parse filter for ResourceId
     fids = _parse_resource_ids(elem, layer.name)
-    if not fids:
+    if not fids or not (prop_updates or geom_update):
         return 0, layer.id
 
+    sets = []
+    params: list = []
+
+    # Merge property updates into the stored JSON in SQLite: json_set keeps
+    # the other keys and writes None as JSON null, like dict.update would.
+    if prop_updates:
+        args = []
+        for field_name, value in prop_updates.items():
+            if '"' in field_name:
+                raise _WfsError("InvalidParameterValue", f"Invalid property name: {field_name!r}")
+            args.append("?, ?")
+            params.extend((f'$."{field_name}"', value))
+        sets.append(f"properties = json_set(COALESCE(NULLIF(properties, ''), '{{}}'), {', '.join(args)})")
+
+    if geom_update:
+        wkb, bbox = geom_update
+        sets.append("geometry = ?, bbox_minx = ?, bbox_miny = ?, bbox_maxx = ?, bbox_maxy = ?")
+        params.extend((wkb, *bbox))
+
+    # One UPDATE per batch of ids; (layer_id, fid) is covered by the
+    # UNIQUE index, so each id is a single index probe.
+    sql = f"UPDATE features SET {', '.join(sets)} WHERE layer_id = ? AND fid IN "
     updated = 0
-    for fid in fids:
-        row = db.execute(
-            "SELECT id, properties FROM features WHERE layer_id = ? AND fid = ?",
-            (layer.id, fid),
-        ).fetchone()
-        if not row:
-            continue
-
-        sets = []
-        params: list = []
-
-        # Merge property updates into existing properties JSON
+    for i in range(0, len(fids), _FIDS_PER_STATEMENT):
+        batch = fids[i : i + _FIDS_PER_STATEMENT]
+        placeholders = f"({','.join('?' * len(batch))})"
         if prop_updates:
-            existing = json.loads(row["properties"]) if row["properties"] else {}
-            existing.update(prop_updates)
-            sets.append("properties = ?")
-            params.append(json.dumps(existing))
-
-        if geom_update:
-            wkb, bbox = geom_update
-            sets.append("geometry = ?")
-            params.append(wkb)
-            sets.append("bbox_minx = ?")
-            params.append(bbox[0])
-            sets.append("bbox_miny = ?")
-            params.append(bbox[1])
-            sets.append("bbox_maxx = ?")
-            params.append(bbox[2])
-            sets.append("bbox_maxy = ?")
-            params.append(bbox[3])
-
-        if sets:
-            params.append(row["id"])
-            db.execute(f"UPDATE features SET {', '.join(sets)} WHERE id = ?", params)
-            updated += 1
+            _repair_properties(db, layer.id, placeholders, batch)
+        cur = db.execute(sql + placeholders, [*params, layer.id, *batch])
+        updated += cur.rowcount
 
     return updated, layer.id
 
 
+def _repair_properties(db: sqlite3.Connection, layer_id: int, placeholders: str, fids: list[str]) -> None:
+    """Make the stored properties of ``fids`` strict JSON so json_set accepts them.
+
+    Older json.dumps-based imports wrote bare NaN/Infinity, which SQLite's
+    JSON functions reject as malformed; those values become null, as orjson
+    writes them.  Rows that are already valid are not touched.
+    """
+    rows = db.execute(
+        "SELECT id, properties FROM features WHERE layer_id = ? AND fid IN "
+        f"{placeholders} AND properties <> '' AND NOT json_valid(properties)",
+        [layer_id, *fids],
+    ).fetchall()
+    for row_id, text in rows:
+        props = json.loads(text, parse_constant=_null_constant)
+        db.execute(
+            "UPDATE features SET properties = ? WHERE id = ?",
+            (json.dumps(props, allow_nan=False), row_id),
+        )
+
+
+def _null_constant(_: str) -> None:
+    return None
+
+
 # ── Delete ───────────────────────────────────────────────────────────────────
 
 def _handle_delete(
-    elem: ET.Element, db: sqlite3.Connection
+    elem: ET.Element, db: sqlite3.Connection, layers: dict[str, Layer]
 ) -> tuple[int, int | None]:
     """Process a wfs:Delete element. Returns (deleted_count, layer_id)."""
     type_name = elem.get("typeName") or elem.get("typeNames") or ""
-    layer = _get_layer(db, type_name)
+    layer = _get_layer(db, type_name, layers)
 
     fids = _parse_resource_ids(elem, layer.name)
     if not fids:
@@ -246,39 +330,91 @@ def _handle_delete(
 
 # ── Helpers ──────────────────────────────────────────────────────────────────
 
-_GML_GEOM_TAGS = {"Point", "LineString", "Polygon", "MultiPoint", "MultiCurve",
-                   "MultiSurface", "MultiGeometry"}
+# Local names of GML geometry elements, in any GML namespace
+_GML_GEOM_TAGS = frozenset(
+    {"Point", "LineString", "Polygon", "MultiPoint", "MultiCurve", "MultiSurface", "MultiGeometry"}
+)
+
+# Feature property names that hold the geometry
+_GEOMETRY_PROPERTIES = frozenset({"geometry", "the_geom"})
+
 
+_CHILD_PROPERTY = 0
+_CHILD_GEOMETRY_WRAPPER = 1
+_CHILD_GML_GEOMETRY = 2
 
-def _is_gml_geometry(elem: ET.Element) -> bool:
-    """Check if an element is a GML geometry element."""
-    local = elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
-    return local in _GML_GEOM_TAGS
+
+@functools.lru_cache(maxsize=1024)
+def _classify_child(tag: str) -> tuple[int, str]:
+    """Classify a feature child's Clark tag as (kind, local name).
+
+    A feature type has a handful of distinct child tags repeated for every
+    feature, so the split and set probes run once per tag, not per element.
+    """
+    local = _local_name(tag)
+    if local in _GEOMETRY_PROPERTIES:
+        return _CHILD_GEOMETRY_WRAPPER, local
+    if local in _GML_GEOM_TAGS:
+        return _CHILD_GML_GEOMETRY, local
+    return _CHILD_PROPERTY, local
+
+
+@functools.lru_cache(maxsize=1024)
+def _local_name(tag: str) -> str:
+    """Strip the {namespace} prefix from a Clark-notation tag."""
+    return tag.rpartition("}")[2]
 
 
 def _find_gml_geometry(parent: ET.Element) -> ET.Element | None:
     """Find the first GML geometry child element."""
-    for child in parent:
-        local = child.tag.split("}")[-1] if "}" in child.tag else child.tag
-        if local in _GML_GEOM_TAGS:
+    for child in parent.iterchildren(ET.Element):
+        if _local_name(child.tag) in _GML_GEOM_TAGS:
             return child
     return None
 
 
-def _get_layer(db: sqlite3.Connection, name: str) -> Layer:
-    """Look up a layer by name, raising WfsError if not found."""
-    row = db.execute("SELECT * FROM layers WHERE name = ?", (name,)).fetchone()
-    if not row:
-        raise _WfsError("InvalidParameterValue", f"Unknown feature type: '{name}'")
-    return Layer.from_row(row)
+def _stored_geometry(gml_elem: ET.Element) -> tuple[bytes, tuple[float, float, float, float]]:
+    """Parse a GML geometry into storage form: EPSG:4326 WKB and its bbox.
+
+    make_transformer is backed by an LRU cache, so features sharing an SRID
+    reuse one Transformer instead of building a PROJ pipeline each.
+    """
+    geom, srid = gml32_to_geom(gml_elem)
+    transformer = make_transformer(srid, 4326)
+    if transformer:
+        geom = reproject_geom(geom, transformer)
+    return geom_to_wkb(geom), bbox_from_geom(geom)
+
+
+def _get_layer(db: sqlite3.Connection, name: str, cache: dict[str, Layer]) -> Layer:
+    """Look up a layer by name, raising WfsError if not found.
+
+    Hits are memoised in ``cache`` for the rest of the transaction, so an
+    Insert of many features of one type selects the layer only once.
+    """
+    layer = cache.get(name)
+    if layer is None:
+        row = db.execute("SELECT * FROM layers WHERE name = ?", (name,)).fetchone()
+        if not row:
+            raise _WfsError("InvalidParameterValue", f"Unknown feature type: '{name}'")
+        layer = cache[name] = Layer.from_row(row)
+    return layer
 
 
 def _parse_resource_ids(elem: ET.Element, layer_name: str) -> list[str]:
-    """Extract feature IDs from fes:Filter/fes:ResourceId elements."""
+    """Extract feature IDs from Filter/ResourceId (FES 2.0) or FeatureId (1.1) elements."""
     fids = []
-    for filt in elem.iter(f"{{{_FES}}}Filter"):
-        for rid in filt.iter(f"{{{_FES}}}ResourceId"):
-            raw = rid.get("rid", "")
+    for filt in elem.iter(ET.Element):
+        if _local_name(filt.tag) != "Filter":
+            continue
+        for rid in filt.iter(ET.Element):
+            local = _local_name(rid.tag)
+            if local == "ResourceId":
+                raw = rid.get("rid", "")
+            elif local == "FeatureId":
+                raw = rid.get("fid", "")
+            else:
+                continue
             # ResourceId format: "LayerName.fid" — strip prefix
             if raw.startswith(f"{layer_name}."):
                 fids.append(raw[len(layer_name) + 1:])
@@ -287,8 +423,51 @@ def _parse_resource_ids(elem: ET.Element, layer_name: str) -> list[str]:
     return fids
 
 
+@dataclass(slots=True)
+class _InsertStats:
+    """Running count and bbox of the rows inserted into one layer."""
+
+    count: int = 0
+    minx: float | None = None
+    miny: float | None = None
+    maxx: float | None = None
+    maxy: float | None = None
+
+    def add(self, bbox: tuple) -> None:
+        self.count += 1
+        minx, miny, maxx, maxy = bbox
+        if minx is None:
+            return
+        if self.minx is None:
+            self.minx, self.miny, self.maxx, self.maxy = bbox
+        else:
+            self.minx = min(self.minx, minx)
+            self.miny = min(self.miny, miny)
+            self.maxx = max(self.maxx, maxx)
+            self.maxy = max(self.maxy, maxy)
+
+
+def _add_layer_stats(db: sqlite3.Connection, layer_id: int, stats: _InsertStats) -> None:
+    """Fold inserted rows into a layer's stored feature_count and bbox."""
+    # MIN()/MAX() with a NULL argument return NULL, so COALESCE falls back to
+    # whichever of the stored and inserted bbox is set.
+    db.execute(
+        "UPDATE layers SET feature_count = feature_count + :count, "
+        "bbox_minx = COALESCE(MIN(bbox_minx, :minx), bbox_minx, :minx), "
+        "bbox_miny = COALESCE(MIN(bbox_miny, :miny), bbox_miny, :miny), "
+        "bbox_maxx = COALESCE(MAX(bbox_maxx, :maxx), bbox_maxx, :maxx), "
+        "bbox_maxy = COALESCE(MAX(bbox_maxy, :maxy), bbox_maxy, :maxy), "
+        "updated_at = datetime('now') WHERE id = :layer_id",
+        {
+            "count": stats.count,
+            "minx": stats.minx, "miny": stats.miny, "maxx": stats.maxx, "maxy": stats.maxy,
+            "layer_id": layer_id,
+        },
+    )
+
+
 def _update_layer_stats(db: sqlite3.Connection, layer_id: int) -> None:
-    """Recompute feature_count and bbox for a layer."""
+    """Recompute feature_count and bbox for a layer (full scan)."""
     row = db.execute(
         "SELECT COUNT(*) as cnt, "
         "MIN(bbox_minx) as minx, MIN(bbox_miny) as miny, "
@@ -3,20 +3,24 @@ OGC WFS 2.0.0 response builders.
 """
 from __future__ import annotations
 
+import functools
+import hashlib
 import json
+import re
 import sqlite3
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
+import orjson
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 
 from config import settings
-from models.db_models import Feature, Layer
+from models.db_models import Layer
 from services.geometry_service import (
-    geom_to_geojson,
-    wkb_to_geom,
-    wkb_to_gml32,
+    geoms_to_geojson_text,
+    wkbs_to_geoms,
+    wkbs_to_gml32,
 )
 
 # ── Jinja2 environment ────────────────────────────────────────────────────────
@@ -56,31 +60,97 @@ def _xsd_type(field_type: str) -> str:
 _jinja_env.filters["gml_geom_type"] = _gml_geom_type
 _jinja_env.filters["xsd_type"] = _xsd_type
 
+# Compiled once at import; get_template() would otherwise stat the template
+# file on every render to check whether it needs reloading.
+_CAPS_TMPL = _jinja_env.get_template("wfs_capabilities.xml")
+_DESCRIBE_TMPL = _jinja_env.get_template("wfs_describe.xml")
+
 
 # ── GetCapabilities ───────────────────────────────────────────────────────────
 
+# Rendered capabilities and DescribeFeatureType documents as (generation,
+# fingerprint, etag, xml).  The ETag is a hash of the XML itself, taken once
+# per render, so it is exact and every process serving the same database
+# agrees on it.  An entry is reused only while the generation counter bumped
+# by invalidate_metadata() and a cheap fingerprint of the layers table both
+# still match, so edits are re-rendered rather than served from the cache.
+_caps_cache: tuple[int, tuple, str, bytes] | None = None
+_describe_cache: dict[tuple[str, ...], tuple[int, tuple, str, bytes]] = {}
+_DESCRIBE_CACHE_MAX = 256
+_metadata_generation = 0
+
+
 def build_capabilities(db: sqlite3.Connection) -> str:
     rows = db.execute("SELECT * FROM layers ORDER BY name").fetchall()
     layers = [Layer.from_row(r) for r in rows]
-    tmpl = _jinja_env.get_template("wfs_capabilities.xml")
-    return tmpl.render(layers=layers, settings=settings, service_url=settings.service_url)
+    return _CAPS_TMPL.render(layers=layers, settings=settings, service_url=settings.service_url)
+
+
+def _metadata_fingerprint(db: sqlite3.Connection) -> tuple:
+    return tuple(db.execute("SELECT COUNT(*), MAX(updated_at) FROM layers").fetchone())
+
+
+def _rendered(generation: int, fingerprint: tuple, text: str) -> tuple[int, tuple, str, bytes]:
+    xml = text.encode()
+    etag = '"' + hashlib.blake2b(xml, digest_size=16).hexdigest() + '"'
+    return generation, fingerprint, etag, xml
+
+
+def get_capabilities(db: sqlite3.Connection) -> tuple[str, bytes]:
+    """Return (etag, xml), re-rendering only when the layers table changed."""
+    global _caps_cache
+    generation = _metadata_generation
+    fingerprint = _metadata_fingerprint(db)
+    cached = _caps_cache
+    if cached is None or cached[:2] != (generation, fingerprint):
+        cached = _caps_cache = _rendered(generation, fingerprint, build_capabilities(db))
+    return cached[2], cached[3]
+
+
+def invalidate_metadata() -> None:
+    """Drop cached capabilities/describe documents after layer metadata changes."""
+    global _caps_cache, _metadata_generation
+    _metadata_generation += 1
+    _caps_cache = None
+    _describe_cache.clear()
 
 
 # ── DescribeFeatureType ───────────────────────────────────────────────────────
 
+def _describe_names(typenames: str | None) -> tuple[str, ...]:
+    if not typenames:
+        return ()
+    return tuple(n.strip() for n in typenames.replace(",", " ").split())
+
+
 def build_describe(typenames: str | None, db: sqlite3.Connection) -> str:
-    if typenames:
-        names = [n.strip() for n in typenames.replace(",", " ").split()]
+    names = _describe_names(typenames)
+    if names:
+        # One fixed statement for any number of names, so the connection's
+        # prepared-statement cache serves it instead of re-parsing each arity.
         rows = db.execute(
-            f"SELECT * FROM layers WHERE name IN ({','.join('?' for _ in names)})",
-            names,
+            "SELECT * FROM layers WHERE name IN (SELECT value FROM json_each(?)) ORDER BY name",
+            (json.dumps(names),),
         ).fetchall()
     else:
         rows = db.execute("SELECT * FROM layers ORDER BY name").fetchall()
 
     layers = [Layer.from_row(r) for r in rows]
-    tmpl = _jinja_env.get_template("wfs_describe.xml")
-    return tmpl.render(layers=layers)
+    return _DESCRIBE_TMPL.render(layers=layers)
+
+
+def get_describe(typenames: str | None, db: sqlite3.Connection) -> tuple[str, bytes]:
+    """Return (etag, xml) for DescribeFeatureType, cached per TYPENAMES list."""
+    names = _describe_names(typenames)
+    generation = _metadata_generation
+    fingerprint = _metadata_fingerprint(db)
+    cached = _describe_cache.get(names)
+    if cached is None or cached[:2] != (generation, fingerprint):
+        cached = _rendered(generation, fingerprint, build_describe(typenames, db))
+        if len(_describe_cache) >= _DESCRIBE_CACHE_MAX:
+            _describe_cache.clear()
+        _describe_cache[names] = cached
+    return cached[2], cached[3]
 
 
 # ── GetFeature ────────────────────────────────────────────────────────────────
@@ -92,38 +162,47 @@ def build_get_feature_geojson(
     count: int | None = None,
     startindex: int = 0,
     max_features: int = 10000,
-) -> dict[str, Any]:
-    """Returns a GeoJSON FeatureCollection dict."""
+) -> bytes:
+    """Returns a GeoJSON FeatureCollection as UTF-8 JSON bytes.
+
+    Stored properties are already JSON text and geometries come out of
+    shapely as JSON text, so each feature is spliced together as bytes
+    instead of being built as a dict and re-encoded.
+    """
+    timestamp = _now_iso()
     name = typenames.strip().split()[0]
     layer_row = db.execute("SELECT * FROM layers WHERE name = ?", (name,)).fetchone()
     if not layer_row:
-        return {"type": "FeatureCollection", "features": [], "numberMatched": 0, "numberReturned": 0}
+        return orjson.dumps(
+            {"type": "FeatureCollection", "features": [], "numberMatched": 0, "numberReturned": 0}
+        )
     layer = Layer.from_row(layer_row)
 
-    features_rows, total = _query_features(db, layer, bbox, count, startindex, max_features)
-    geojson_features = []
-    for feat in features_rows:
-        geom_json = None
-        if feat.geometry:
-            try:
-                geom = wkb_to_geom(bytes(feat.geometry))
-                geom_json = geom_to_geojson(geom)
-            except Exception:
-                pass
-        geojson_features.append({
-            "type": "Feature",
-            "id": f"{layer.name}.{feat.fid}",
-            "geometry": geom_json,
-            "properties": feat.properties,
-        })
-
-    return {
+    rows, total = _query_features(db, layer, bbox, count, startindex, max_features)
+    geoms = wkbs_to_geoms([row["geometry"] for row in rows])
+    id_prefix = f"{layer.name}."
+    features = []
+    for row, geom_text in zip(rows, geoms_to_geojson_text(geoms)):
+        features.append(
+            b'{"type":"Feature","id":' + orjson.dumps(id_prefix + row["fid"])
+            + b',"geometry":' + (geom_text.encode() if geom_text is not None else b"null")
+            + b',"properties":' + properties_json(row["properties"])
+            + b"}"
+        )
+
+    header = orjson.dumps({
         "type": "FeatureCollection",
         "numberMatched": total,
-        "numberReturned": len(geojson_features),
-        "timeStamp": _now_iso(),
-        "features": geojson_features,
-    }
+        "numberReturned": len(features),
+        "timeStamp": timestamp,
+    })
+    # Reopen the header object to append the features array
+    return header[:-1] + b',"features":[' + b",".join(features) + b"]}"
+
+
+# Members per chunk handed to StreamingResponse.  Each chunk is one thread
+# pool hop for Starlette, so chunks are batched rather than per feature.
+_GML_STREAM_BATCH = 500
 
 
 def build_get_feature_gml(
@@ -133,61 +212,114 @@ def build_get_feature_gml(
     count: int | None = None,
     startindex: int = 0,
     max_features: int = 10000,
-) -> str:
-    """Returns a GML 3.2 WFS FeatureCollection string."""
+) -> Iterator[bytes]:
+    """Returns a GML 3.2 WFS FeatureCollection as an iterator of UTF-8 chunks.
+
+    All database work happens before this returns; the iterator only
+    serialises the fetched rows, so it may run after the connection has gone
+    back to the pool.  Pieces stay encoded bytes (geometry GML is cached
+    already encoded), so there is never a full-size str copy to re-encode.
+    """
+    timestamp = _now_iso()
     name = typenames.strip().split()[0]
     layer_row = db.execute("SELECT * FROM layers WHERE name = ?", (name,)).fetchone()
     if not layer_row:
-        return _empty_gml_collection()
+        return iter((_empty_gml_collection(timestamp).encode(),))
     layer = Layer.from_row(layer_row)
 
-    features_rows, total = _query_features(db, layer, bbox, count, startindex, max_features)
-    srs = f"urn:ogc:def:crs:EPSG::{layer.srid}"
-    members = []
-    for feat in features_rows:
-        props_xml = "".join(
-            f"<{_safe_tag(k)}>{_esc(v)}</{_safe_tag(k)}>"
-            for k, v in feat.properties.items()
-        )
-        geom_xml = ""
-        if feat.geometry:
-            try:
-                geom_xml = f"<geometry>{wkb_to_gml32(bytes(feat.geometry), layer.srid)}</geometry>"
-            except Exception:
-                pass
-        members.append(
-            f'<wfs:member><{layer.name} gml:id="{layer.name}.{feat.fid}">'
-            f"{geom_xml}{props_xml}"
-            f"</{layer.name}></wfs:member>"
-        )
-
-    bbox_xml = _bbox_gml(layer, srs)
-    members_str = "\n".join(members)
-    return (
+    rows, total = _query_features(db, layer, bbox, count, startindex, max_features)
+    header = (
         '<?xml version="1.0" encoding="UTF-8"?>'
         f'<wfs:FeatureCollection '
         f'xmlns:wfs="http://www.opengis.net/wfs/2.0" '
         f'xmlns:gml="http://www.opengis.net/gml/3.2" '
         f'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
-        f'numberMatched="{total}" numberReturned="{len(features_rows)}" '
-        f'timeStamp="{_now_iso()}">'
-        f"{bbox_xml}"
-        f"{members_str}"
-        f"</wfs:FeatureCollection>"
+        f'numberMatched="{total}" numberReturned="{len(rows)}" '
+        f'timeStamp="{timestamp}">'
+        f"{_bbox_gml(layer)}"
     )
-
-
-def _empty_gml_collection() -> str:
+    return _gml_chunks(layer, rows, header.encode())
+
+
+def _gml_chunks(layer: Layer, rows: list[sqlite3.Row], header: bytes) -> Iterator[bytes]:
+    yield header
+    member_open = f'<wfs:member><{layer.name} gml:id="{layer.name}.'
+    member_close = f"</{layer.name}></wfs:member>".encode()
+    # Features of a layer nearly always share one property layout, so each
+    # distinct key order gets a %-format string with its tags baked in.
+    props_formats: dict[tuple[str, ...], str] = {}
+    separator = b""
+    for start in range(0, len(rows), _GML_STREAM_BATCH):
+        # Pieces of a chunk go into one flat list joined once, so geometry
+        # GML is copied only into the chunk itself.
+        parts: list[bytes] = []
+        append = parts.append
+        # Rows are read field by field rather than through Feature.from_row;
+        # the dataclass and json.loads cost more per feature than the XML.
+        batch = rows[start:start + _GML_STREAM_BATCH]
+        geom_gmls = wkbs_to_gml32([row["geometry"] for row in batch], layer.srid)
+        for row, geom_gml in zip(batch, geom_gmls):
+            append(separator)
+            separator = b"\n"
+            append(f'{member_open}{_esc_attr(row["fid"])}">'.encode())
+            if geom_gml is not None:
+                append(b"<geometry>")
+                append(geom_gml)
+                append(b"</geometry>")
+            props = _load_properties(row["properties"])
+            keys = tuple(props)
+            props_fmt = props_formats.get(keys)
+            if props_fmt is None:
+                props_fmt = props_formats[keys] = _props_format(keys)
+            append((props_fmt % tuple(map(_esc, props.values()))).encode())
+            append(member_close)
+        yield b"".join(parts)
+    yield b"</wfs:FeatureCollection>"
+
+
+def _empty_gml_collection(timestamp: str) -> str:
     return (
         '<?xml version="1.0" encoding="UTF-8"?>'
         '<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs/2.0" '
         f'xmlns:gml="http://www.opengis.net/gml/3.2" '
-        f'numberMatched="0" numberReturned="0" timeStamp="{_now_iso()}"/>'
+        f'numberMatched="0" numberReturned="0" timeStamp="{timestamp}"/>'
     )
 
 
 # ── Feature query ─────────────────────────────────────────────────────────────
 
+# Both statements of each pair bind from one dict of named parameters, and
+# their text is fixed, so every request hits sqlite3's statement cache.
+_SQL_COUNT_FEATURES = "SELECT COUNT(*) FROM features f WHERE f.layer_id = :layer_id"
+_SQL_PAGE_FEATURES = (
+    "SELECT f.* FROM features f WHERE f.layer_id = :layer_id"
+    " ORDER BY f.id LIMIT :limit OFFSET :offset"
+)
+
+# The R*Tree stores float32 bounds rounded outward, so the exact test on the
+# bbox columns stays.
+_BBOX_EXACT = (
+    " AND NOT (f.bbox_maxx < :minx OR f.bbox_minx > :maxx"
+    " OR f.bbox_maxy < :miny OR f.bbox_miny > :maxy)"
+)
+# Counting: CROSS JOIN makes the R*Tree drive the join, so candidates come
+# straight from the spatial index.
+_SQL_COUNT_FEATURES_BBOX = (
+    "SELECT COUNT(*) FROM features_rtree r CROSS JOIN features f ON f.id = r.id"
+    " WHERE f.layer_id = :layer_id"
+    " AND r.maxx >= :minx AND r.minx <= :maxx AND r.maxy >= :miny AND r.miny <= :maxy"
+    + _BBOX_EXACT
+)
+# Fetching a page: the R*Tree ids become an IN list that is probed in rowid
+# order, so ORDER BY f.id needs no temp B-tree sort.
+_SQL_PAGE_FEATURES_BBOX = (
+    "SELECT f.* FROM features f WHERE f.id IN (SELECT id FROM features_rtree"
+    " WHERE maxx >= :minx AND minx <= :maxx AND maxy >= :miny AND miny <= :maxy)"
+    " AND f.layer_id = :layer_id" + _BBOX_EXACT
+    + " ORDER BY f.id LIMIT :limit OFFSET :offset"
+)
+
+
 def _query_features(
     db: sqlite3.Connection,
     layer: Layer,
@@ -195,58 +327,141 @@ def _query_features(
     count: int | None,
     startindex: int,
     max_features: int,
-) -> tuple[list[Feature], int]:
-    base_sql = "FROM features WHERE layer_id = ?"
-    params: list[Any] = [layer.id]
-
-    if bbox:
-        minx, miny, maxx, maxy = bbox
-        base_sql += (
-            " AND NOT (bbox_maxx < ? OR bbox_minx > ? OR bbox_maxy < ? OR bbox_miny > ?)"
-        )
-        params.extend([minx, maxx, miny, maxy])
+) -> tuple[list[sqlite3.Row], int]:
+    limit = min(count if count is not None else max_features, max_features)
+    params: dict[str, Any] = {"layer_id": layer.id, "limit": limit, "offset": startindex}
 
-    total_row = db.execute(f"SELECT COUNT(*) {base_sql}", params).fetchone()
-    total = total_row[0] if total_row else 0
+    # Optionally serve small layers whole and let the client clip, as
+    # MapServer's wfs_use_default_extent_for_getfeature does.
+    if bbox and layer.feature_count < settings.bbox_skip_below_features:
+        bbox = None
 
-    limit = min(count if count is not None else max_features, max_features)
-    rows = db.execute(
-        f"SELECT * {base_sql} ORDER BY id LIMIT ? OFFSET ?",
-        params + [limit, startindex],
-    ).fetchall()
-    return [Feature.from_row(r) for r in rows], total
+    if bbox:
+        params["minx"], params["miny"], params["maxx"], params["maxy"] = bbox
+        count_sql, page_sql = _SQL_COUNT_FEATURES_BBOX, _SQL_PAGE_FEATURES_BBOX
+    else:
+        count_sql, page_sql = _SQL_COUNT_FEATURES, _SQL_PAGE_FEATURES
+
+    # Raw rows are returned and each builder converts them while writing,
+    # so there is never a second per-feature list.  The page stays
+    # materialised because numberReturned leads the response and geometry
+    # is encoded in one batch.
+    rows = db.execute(page_sql, params).fetchall()
+
+    # A short page is the last one, so it already tells us the match count.
+    # COUNT(*) OVER () would save the round-trip but makes SQLite materialise
+    # every match before the LIMIT applies.
+    if len(rows) < limit and (rows or startindex == 0):
+        total = startindex + len(rows)
+    else:
+        total_row = db.execute(count_sql, params).fetchone()
+        total = total_row[0] if total_row else 0
+    return rows, total
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 def _now_iso() -> str:
-    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+    # isoformat() is about twice as fast as the equivalent strftime pattern
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")[:-6] + "Z"
 
 
+@functools.lru_cache(maxsize=4096)
 def _safe_tag(name: str) -> str:
-    """Make a string safe as an XML tag."""
+    """Make a string safe as an XML tag.
+
+    Cached: GetFeature asks for the same handful of field names on every
+    feature of a layer.
+    """
     name = "".join(c if c.isalnum() or c in ("_", "-", ".") else "_" for c in str(name))
     if name and name[0].isdigit():
         name = "_" + name
     return name or "field"
 
 
+# str() of these never contains a character that needs escaping.
+_PLAIN_VALUE_TYPES = frozenset((int, float, bool))
+
+
+# orjson reads integers beyond 64 bits as floats; the json module keeps them
+# exact, so it takes any row with a run of digits that long.
+_LONG_INT_RE = re.compile(r"\d{20}")
+
+
+def _load_properties(text: str | None) -> dict[str, Any]:
+    if not text:
+        return {}
+    if _LONG_INT_RE.search(text):
+        return json.loads(text)
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        # NaN/Infinity written by older json.dumps-based imports
+        return json.loads(text)
+
+
+def properties_json(text: str | None) -> bytes:
+    """Stored properties as JSON bytes, ready to splice into a response.
+
+    Rows from older json.dumps-based imports can hold bare NaN/Infinity,
+    which is not JSON.  Only text mentioning either is parsed; if orjson
+    rejects it, it is rewritten with those values as null.
+    """
+    if not text:
+        return b"{}"
+    if "NaN" in text or "Infinity" in text:
+        try:
+            orjson.loads(text)
+        except orjson.JSONDecodeError:
+            return json.dumps(json.loads(text, parse_constant=_null_constant), allow_nan=False).encode()
+    return text.encode()
+
+
+def _null_constant(_: str) -> None:
+    return None
+
+
+def _props_format(keys: tuple[str, ...]) -> str:
+    """%-format string rendering one property element per key, in order."""
+    parts = []
+    for key in keys:
+        tag = _safe_tag(key)
+        parts.append(f"<{tag}>%s</{tag}>")
+    return "".join(parts)
+
+
 def _esc(v: Any) -> str:
-    if v is None:
-        return ""
-    s = str(v)
-    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    # Chained str.replace beats str.translate here: each replace is a C
+    # substring search that returns the string untouched when nothing matches,
+    # while translate rebuilds every string character by character.
+    if v.__class__ is not str:
+        if v is None:
+            return ""
+        if v.__class__ in _PLAIN_VALUE_TYPES:
+            return str(v)
+        v = str(v)
+    return v.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
 
+def _esc_attr(v: str) -> str:
+    return _esc(v).replace('"', "&quot;")
 
-def _bbox_gml(layer: Layer, srs: str) -> str:
+
+def _bbox_gml(layer: Layer) -> str:
     if not layer.has_bbox:
         return ""
+    return _envelope_gml(layer.srid, layer.bbox_minx, layer.bbox_miny, layer.bbox_maxx, layer.bbox_maxy)
+
+
+@functools.lru_cache(maxsize=256)
+def _envelope_gml(srid: int, minx: float, miny: float, maxx: float, maxy: float) -> str:
+    # Cached: a layer's extent only changes on import or WFS-T.
     # For EPSG:4326 the axis order is lat,lon (Y,X) — swap min/max accordingly.
-    swap = "EPSG::4326" in srs
-    lc = f"{layer.bbox_miny} {layer.bbox_minx}" if swap else f"{layer.bbox_minx} {layer.bbox_miny}"
-    uc = f"{layer.bbox_maxy} {layer.bbox_maxx}" if swap else f"{layer.bbox_maxx} {layer.bbox_maxy}"
+    swap = srid == 4326
+    lc = f"{miny} {minx}" if swap else f"{minx} {miny}"
+    uc = f"{maxy} {maxx}" if swap else f"{maxx} {maxy}"
     return (
-        f'<gml:boundedBy><gml:Envelope srsName="{srs}">'
+        f'<gml:boundedBy><gml:Envelope srsName="urn:ogc:def:crs:EPSG::{srid}">'
         f"<gml:lowerCorner>{lc}</gml:lowerCorner>"
         f"<gml:upperCorner>{uc}</gml:upperCorner>"
         f"</gml:Envelope></gml:boundedBy>"
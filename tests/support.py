@@ -0,0 +1,33 @@
+"""Shared fixtures: one throwaway database per test run."""
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import database
+from config import settings
+
+_tmpdir: tempfile.TemporaryDirectory | None = None
+
+
+@contextmanager
+def db_writer() -> Iterator[sqlite3.Connection]:
+    """Hold the writer of a temporary database, created on first use."""
+    global _tmpdir
+    if _tmpdir is None:
+        _tmpdir = tempfile.TemporaryDirectory()
+        settings.db_path = str(Path(_tmpdir.name) / "test.db")
+        database.init_db()
+    with database.writer() as db:
+        yield db
+
+
+def create_layer(db: sqlite3.Connection, prefix: str = "layer") -> tuple[int, str]:
+    """Insert an empty layer with a unique name; returns (id, name)."""
+    name = f"{prefix}_{uuid.uuid4().hex[:8]}"
+    row = db.execute("INSERT INTO layers (name) VALUES (?) RETURNING id", (name,)).fetchone()
+    return row[0], name
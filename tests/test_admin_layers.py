@@ -0,0 +1,23 @@
+import unittest
+
+import orjson
+
+from routers.admin_layers import feature_preview
+from tests.support import create_layer, db_writer
+
+
+class FeaturePreviewTests(unittest.TestCase):
+    def test_non_finite_properties_are_previewed_as_null(self):
+        with db_writer() as db:
+            layer_id, _ = create_layer(db)
+            db.execute(
+                "INSERT INTO features (layer_id, fid, geometry, properties) VALUES (?, 'a', NULL, ?)",
+                (layer_id, '{"v": NaN, "n": 1}'),
+            )
+            response = feature_preview(layer_id, max=10, db=db)
+        features = orjson.loads(response.body)["features"]
+        self.assertEqual(features[0]["properties"], {"v": None, "n": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
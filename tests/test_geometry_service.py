@@ -0,0 +1,56 @@
+import unittest
+from unittest import mock
+
+import shapely
+
+from config import settings
+from services import geometry_service
+from services.geometry_service import clear_gml_cache, wkb_to_gml32, wkbs_to_gml32
+
+
+def _gml(wkt: str, srid: int = 3857) -> str:
+    return wkb_to_gml32(shapely.to_wkb(shapely.from_wkt(wkt)), srid).decode()
+
+
+class GmlCoordinateTests(unittest.TestCase):
+    def test_empty_geometries_have_empty_pos_list(self):
+        self.assertEqual(
+            _gml("LINESTRING EMPTY"),
+            '<gml:LineString srsName="urn:ogc:def:crs:EPSG::3857"><gml:posList></gml:posList></gml:LineString>',
+        )
+        self.assertIn("<gml:LinearRing><gml:posList></gml:posList></gml:LinearRing>", _gml("POLYGON EMPTY"))
+
+    def test_pos_and_pos_list_share_one_exact_format(self):
+        x, y = 0.1 + 0.2, 1 / 3
+        self.assertIn(f"<gml:pos>{x!r} {y!r}</gml:pos>", _gml(f"POINT ({x!r} {y!r})"))
+        self.assertIn(f"<gml:posList>2.0 1.0 {y!r} {x!r}</gml:posList>", _gml(f"LINESTRING (1 2, {x!r} {y!r})", 4326))
+        self.assertEqual(
+            wkbs_to_gml32([shapely.to_wkb(shapely.Point(2, 3))])[0],
+            _gml("POINT (2 3)", 4326).encode(),
+        )
+
+
+class GmlCacheTests(unittest.TestCase):
+    def setUp(self):
+        clear_gml_cache()
+        self.addCleanup(clear_gml_cache)
+
+    def test_cache_stays_within_byte_budget(self):
+        lines = [shapely.to_wkb(shapely.LineString([(i, 0), (i, 1)])) for i in range(100)]
+        with mock.patch.object(settings, "gml_cache_max_bytes", 4000):
+            for wkb in lines:
+                wkb_to_gml32(wkb, 3857)
+            self.assertLessEqual(geometry_service._gml_cache_bytes, 4000)
+            self.assertLess(len(geometry_service._gml_cache), 100)
+            # the most recent entries are the ones kept
+            self.assertIn((lines[-1], 3857), geometry_service._gml_cache)
+            self.assertEqual(wkb_to_gml32(lines[0], 3857), _gml("LINESTRING (0 0, 0 1)").encode())
+
+    def test_zero_budget_disables_cache(self):
+        with mock.patch.object(settings, "gml_cache_max_bytes", 0):
+            wkb_to_gml32(shapely.to_wkb(shapely.LineString([(0, 0), (1, 1)])))
+        self.assertEqual(len(geometry_service._gml_cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import io
+import json
+import unittest
+from unittest import mock
+
+from services import import_service
+from services.import_service import import_file_obj
+from tests.support import create_layer, db_writer
+
+BIG = 123456789012345678901234567890
+
+
+class BigIntegerPropertyTests(unittest.TestCase):
+    def test_csv_big_integer_column_is_imported_exactly(self):
+        csv = f"id,lat,lon\n{BIG},1,2\n7,3,4\n".encode()
+        with db_writer() as db:
+            layer_id, _ = create_layer(db)
+            result = import_file_obj(io.BytesIO(csv), ".csv", layer_id, db)
+            rows = db.execute(
+                "SELECT properties FROM features WHERE layer_id = ? ORDER BY id", (layer_id,)
+            ).fetchall()
+        self.assertEqual(result.features_imported, 2)
+        self.assertEqual(result.features_failed, 0)
+        self.assertEqual(json.loads(rows[0][0]), {"id": BIG})
+
+    def test_big_integer_row_with_nan_stores_valid_json(self):
+        csv = f"id,v,lat,lon\n{BIG},nan,1,2\n".encode()
+        with db_writer() as db:
+            layer_id, _ = create_layer(db)
+            import_file_obj(io.BytesIO(csv), ".csv", layer_id, db)
+            props = db.execute("SELECT properties FROM features WHERE layer_id = ?", (layer_id,)).fetchone()[0]
+        self.assertEqual(json.loads(props, parse_constant=self.fail), {"id": BIG, "v": None})
+
+    def test_geojson_big_integer_property_is_imported_exactly(self):
+        fc = {"type": "FeatureCollection", "features": [
+            {"type": "Feature", "geometry": {"type": "Point", "coordinates": [1, 2]},
+             "properties": {"ref": BIG}},
+        ]}
+        with db_writer() as db:
+            layer_id, _ = create_layer(db)
+            result = import_file_obj(io.BytesIO(json.dumps(fc).encode()), ".geojson", layer_id, db)
+            props = db.execute(
+                "SELECT properties FROM features WHERE layer_id = ?", (layer_id,)
+            ).fetchone()[0]
+        self.assertEqual(result.features_imported, 1)
+        self.assertEqual(json.loads(props), {"ref": BIG})
+
+
+class FeatureIsolationTests(unittest.TestCase):
+    """A feature failing after parsing must not take its chunk down with it."""
+
+    def setUp(self):
+        dump = import_service._dump_properties
+
+        def failing_dump(props):
+            if props.get("name") == "bad":
+                raise ValueError("cannot encode")
+            return dump(props)
+
+        patcher = mock.patch.object(import_service, "_dump_properties", failing_dump)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_geojson_bad_feature_is_reported_alone(self):
+        fc = {"type": "FeatureCollection", "features": [
+            {"type": "Feature", "geometry": {"type": "Point", "coordinates": [i, i]},
+             "properties": {"name": "bad" if i == 1 else f"f{i}"}}
+            for i in range(3)
+        ]}
+        with db_writer() as db:
+            layer_id, _ = create_layer(db)
+            result = import_file_obj(io.BytesIO(json.dumps(fc).encode()), ".geojson", layer_id, db)
+            count = db.execute("SELECT feature_count FROM layers WHERE id = ?", (layer_id,)).fetchone()[0]
+        self.assertEqual(result.features_imported, 2)
+        self.assertEqual(result.features_failed, 1)
+        self.assertEqual(result.errors, ["Feature 1: cannot encode"])
+        self.assertEqual(result.bbox, [0.0, 0.0, 2.0, 2.0])
+        self.assertEqual(count, 2)
+
+    def test_csv_bad_row_is_reported_alone(self):
+        csv = b"name,lat,lon\nok,1,2\nbad,3,4\nok,5,6\n"
+        with db_writer() as db:
+            layer_id, _ = create_layer(db)
+            result = import_file_obj(io.BytesIO(csv), ".csv", layer_id, db)
+        self.assertEqual(result.features_imported, 2)
+        self.assertEqual(result.features_failed, 1)
+        self.assertEqual(result.errors, ["Row 2: cannot encode"])
+
+
+class GeoJSONPointCoordinateTests(unittest.TestCase):
+    def test_non_numeric_point_coordinates_fail_like_shape(self):
+        coords = [[1, 2], [None, 2], [1, "x"], ["3", "4"], [5.5, 6]]
+        fc = {"type": "FeatureCollection", "features": [
+            {"type": "Feature", "geometry": {"type": "Point", "coordinates": c}, "properties": {}}
+            for c in coords
+        ]}
+        with db_writer() as db:
+            layer_id, _ = create_layer(db)
+            result = import_file_obj(io.BytesIO(json.dumps(fc).encode()), ".geojson", layer_id, db)
+        self.assertEqual(result.features_imported, 3)
+        self.assertEqual(result.features_failed, 2)
+        self.assertEqual([e.split(":")[0] for e in result.errors], ["Feature 1", "Feature 2"])
+        self.assertEqual(result.bbox, [1.0, 2.0, 5.5, 6.0])
+
+
+class CsvDataRowTests(unittest.TestCase):
+    def test_header_and_blank_lines_report_no_data_rows(self):
+        with db_writer() as db:
+            layer_id, _ = create_layer(db)
+            result = import_file_obj(io.BytesIO(b"lat,lon,name\n\n\n"), ".csv", layer_id, db)
+        self.assertEqual(result.features_imported, 0)
+        self.assertEqual(result.errors, ["CSV has no data rows"])
+
+    def test_rows_after_blank_lines_are_numbered_without_them(self):
+        with db_writer() as db:
+            layer_id, _ = create_layer(db)
+            result = import_file_obj(io.BytesIO(b"lat,lon\n\n1,2\n\nbad,3\n"), ".csv", layer_id, db)
+        self.assertEqual(result.features_imported, 1)
+        self.assertEqual([e.split(":")[0] for e in result.errors], ["Row 2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
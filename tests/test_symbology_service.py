@@ -0,0 +1,37 @@
+import dataclasses
+import unittest
+from unittest import mock
+
+from models.db_models import SymbologyRule
+from services import symbology_service
+from services.symbology_service import evaluate_rules
+
+
+def _rule(id, order, op="eq", value="a", default=False):
+    return SymbologyRule(
+        id=id, layer_id=1, rule_order=order, label=f"r{id}", filter_field=None if default else "k",
+        filter_operator=op, filter_value=value, fill_color="#000000", fill_opacity=1.0,
+        stroke_color="#000000", stroke_width=1.0, point_radius=1.0, is_default=default,
+    )
+
+
+class EvaluateRulesTests(unittest.TestCase):
+    def test_rule_sets_are_compiled_once(self):
+        rules = [_rule(2, 1, "gt", "5"), _rule(1, 0, "eq", "a"), _rule(3, 2, default=True)]
+        with mock.patch.object(symbology_service, "compile_rules", wraps=symbology_service.compile_rules) as compile_rules:
+            self.assertEqual(evaluate_rules(rules, {"k": "a"}).id, 1)
+            self.assertEqual(evaluate_rules(rules, {"k": 7.0}).id, 2)
+            self.assertEqual(evaluate_rules(rules, {"k": 1}).id, 3)
+            self.assertEqual(compile_rules.call_count, 1)
+
+            # An edited rule is a different rule set
+            rules[0] = dataclasses.replace(rules[0], filter_value="10")
+            self.assertEqual(evaluate_rules(rules, {"k": 7.0}).id, 3)
+            self.assertEqual(compile_rules.call_count, 2)
+
+    def test_no_rules(self):
+        self.assertIsNone(evaluate_rules([], {"k": "a"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
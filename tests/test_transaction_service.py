@@ -0,0 +1,102 @@
+import io
+import json
+import unittest
+
+import shapely
+
+from services.transaction_service import execute_transaction
+from tests.support import create_layer, db_writer
+
+WFS11 = 'xmlns:wfs="http://www.opengis.net/wfs" xmlns:gml="http://www.opengis.net/gml" xmlns:ogc="http://www.opengis.net/ogc"'
+
+
+def _run(db, xml: str) -> str:
+    return execute_transaction(io.BytesIO(xml.encode()), db)
+
+
+def _features(db, layer_id):
+    rows = db.execute(
+        "SELECT fid, geometry, properties FROM features WHERE layer_id = ? ORDER BY fid", (layer_id,)
+    ).fetchall()
+    return {fid: (geom, json.loads(props)) for fid, geom, props in rows}
+
+
+class TransactionNamespaceTests(unittest.TestCase):
+    def test_unnamespaced_transaction_is_executed(self):
+        with db_writer() as db:
+            layer_id, name = create_layer(db)
+            resp = _run(db, f"""
+                <Transaction service="WFS" version="2.0.0">
+                  <Insert><{name} id="x"><label>plain</label></{name}></Insert>
+                </Transaction>""")
+            feats = _features(db, layer_id)
+        self.assertIn("<wfs:totalInserted>1</wfs:totalInserted>", resp)
+        self.assertEqual([props for _, props in feats.values()], [{"label": "plain"}])
+
+    def test_wfs11_transaction_with_gml311_geometry(self):
+        with db_writer() as db:
+            layer_id, name = create_layer(db)
+            resp = _run(db, f"""
+                <wfs:Transaction service="WFS" version="1.1.0" {WFS11}>
+                  <wfs:Insert>
+                    <{name} gml:id="{name}.a">
+                      <label>one</label>
+                      <geometry><gml:Point srsName="urn:ogc:def:crs:EPSG::4326"><gml:pos>2 1</gml:pos></gml:Point></geometry>
+                    </{name}>
+                    <{name} gml:id="{name}.b">
+                      <gml:LineString srsName="urn:ogc:def:crs:EPSG::4326"><gml:posList>0 0 1 1</gml:posList></gml:LineString>
+                    </{name}>
+                  </wfs:Insert>
+                </wfs:Transaction>""")
+            self.assertIn("<wfs:totalInserted>2</wfs:totalInserted>", resp)
+            feats = _features(db, layer_id)
+            self.assertEqual(shapely.from_wkb(feats["a"][0]).coords[:], [(1.0, 2.0)])
+            self.assertEqual(feats["a"][1], {"label": "one"})
+            self.assertEqual(shapely.from_wkb(feats["b"][0]).geom_type, "LineString")
+            self.assertEqual(feats["b"][1], {})
+
+            resp = _run(db, f"""
+                <wfs:Transaction service="WFS" version="1.1.0" {WFS11}>
+                  <wfs:Update typeName="{name}">
+                    <wfs:Property><wfs:Name>label</wfs:Name><wfs:Value>two</wfs:Value></wfs:Property>
+                    <ogc:Filter><ogc:FeatureId fid="{name}.a"/></ogc:Filter>
+                  </wfs:Update>
+                  <wfs:Delete typeName="{name}">
+                    <ogc:Filter><ogc:FeatureId fid="{name}.b"/></ogc:Filter>
+                  </wfs:Delete>
+                </wfs:Transaction>""")
+            feats = _features(db, layer_id)
+        self.assertIn("<wfs:totalUpdated>1</wfs:totalUpdated>", resp)
+        self.assertIn("<wfs:totalDeleted>1</wfs:totalDeleted>", resp)
+        self.assertEqual(list(feats), ["a"])
+        self.assertEqual(feats["a"][1], {"label": "two"})
+
+    def test_non_transaction_root_is_rejected(self):
+        with db_writer() as db:
+            resp = _run(db, '<wfs:GetFeature xmlns:wfs="http://www.opengis.net/wfs/2.0"/>')
+        self.assertIn('exceptionCode="OperationNotSupported"', resp)
+        self.assertIn("got GetFeature", resp)
+
+
+class UpdateLegacyPropertiesTests(unittest.TestCase):
+    def test_update_merges_into_row_with_nan(self):
+        with db_writer() as db:
+            layer_id, name = create_layer(db)
+            db.execute(
+                "INSERT INTO features (layer_id, fid, geometry, properties) VALUES (?, 'a', NULL, ?)",
+                (layer_id, '{"v": NaN, "label": "old"}'),
+            )
+            resp = _run(db, f"""
+                <wfs:Transaction service="WFS" version="2.0.0" xmlns:wfs="http://www.opengis.net/wfs/2.0" xmlns:fes="http://www.opengis.net/fes/2.0">
+                  <wfs:Update typeName="{name}">
+                    <wfs:Property><wfs:ValueReference>label</wfs:ValueReference><wfs:Value>new</wfs:Value></wfs:Property>
+                    <fes:Filter><fes:ResourceId rid="{name}.a"/></fes:Filter>
+                  </wfs:Update>
+                </wfs:Transaction>""")
+            feats = _features(db, layer_id)
+        self.assertIn("<wfs:totalUpdated>1</wfs:totalUpdated>", resp)
+        self.assertEqual(feats["a"][1], {"v": None, "label": "new"})
+
+
+if __name__ == "__main__":
+    unittest.main()
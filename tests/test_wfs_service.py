@@ -0,0 +1,69 @@
+import unittest
+
+import orjson
+
+from services import wfs_service
+from tests.support import create_layer, db_writer
+
+
+class MetadataEtagTests(unittest.TestCase):
+    def _set_title(self, db, layer_id, title):
+        db.execute("UPDATE layers SET title = ?, updated_at = '2026-01-01 00:00:00' WHERE id = ?", (title, layer_id))
+        wfs_service.invalidate_metadata()
+
+    def test_etag_follows_the_rendered_document(self):
+        with db_writer() as db:
+            layer_id, _ = create_layer(db)
+            etag, xml = wfs_service.get_capabilities(db)
+            self.assertIs(wfs_service.get_capabilities(db)[1], xml)
+
+            # Re-rendering an unchanged document keeps its ETag
+            wfs_service.invalidate_metadata()
+            self.assertEqual(wfs_service.get_capabilities(db), (etag, xml))
+
+            # Two edits stamped with the same updated_at still get distinct ETags
+            self._set_title(db, layer_id, "first")
+            etag1, xml1 = wfs_service.get_capabilities(db)
+            self._set_title(db, layer_id, "second")
+            etag2, xml2 = wfs_service.get_capabilities(db)
+        self.assertIn(b"first", xml1)
+        self.assertIn(b"second", xml2)
+        self.assertEqual(len({etag, etag1, etag2}), 3)
+
+    def test_describe_etag_follows_the_rendered_document(self):
+        with db_writer() as db:
+            _, name = create_layer(db)
+            etag, xml = wfs_service.get_describe(name, db)
+            wfs_service.invalidate_metadata()
+            self.assertEqual(wfs_service.get_describe(name, db), (etag, xml))
+            self.assertNotEqual(wfs_service.get_describe(None, db)[0], etag)
+
+
+class GmlPropertyTests(unittest.TestCase):
+    def test_big_integer_property_is_served_exactly(self):
+        big = 123456789012345678901234567890
+        with db_writer() as db:
+            layer_id, name = create_layer(db)
+            db.execute(
+                "INSERT INTO features (layer_id, fid, geometry, properties) VALUES (?, 'a', NULL, ?)",
+                (layer_id, f'{{"ref": {big}}}'),
+            )
+            gml = b"".join(wfs_service.build_get_feature_gml(name, db))
+        self.assertIn(f">{big}<".encode(), gml)
+
+
+class GeoJSONPropertyTests(unittest.TestCase):
+    def test_non_finite_properties_are_served_as_null(self):
+        with db_writer() as db:
+            layer_id, name = create_layer(db)
+            db.executemany(
+                "INSERT INTO features (layer_id, fid, geometry, properties) VALUES (?, ?, NULL, ?)",
+                [(layer_id, "a", '{"v": NaN, "w": -Infinity, "s": "NaN"}'), (layer_id, "b", '{"s": "Infinity"}')],
+            )
+            body = wfs_service.build_get_feature_geojson(name, db)
+        props = {f["id"]: f["properties"] for f in orjson.loads(body)["features"]}
+        self.assertEqual(props, {f"{name}.a": {"v": None, "w": None, "s": "NaN"}, f"{name}.b": {"s": "Infinity"}})
+
+
+if __name__ == "__main__":
+    unittest.main()